@@ -0,0 +1,345 @@
+import sys
+import os
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+import tracemalloc
+import subprocess
+from contextlib import contextmanager
+
+# --- 路径修正 (确保能找到 simulation / models) ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+
+import numpy as np
+import config as c
+
+from models.battery_model import BatterySystem
+from models.power_model import SimulationPlan
+from simulation.init_utils import get_initial_state_by_soh
+from simulation.simulator import run_single_static_test
+from solver import RK4Solver
+
+COST_FILE = os.path.join(project_root, "Cost.json")
+HISTORY_FILE = os.path.join(current_dir, "history.jsonl")
+
+# 每个指标的方向: True 表示越大越好 (吞吐量), False 表示越小越好 (耗时/内存)
+HIGHER_IS_BETTER = {
+    "derivative_eval_us": False,
+    "rk4_step_us": False,
+    "scan_external_cases_per_min": True,
+    "memory_per_case_kib": False,
+    "import_core_ms": False,
+    "first_case_ms": False,
+}
+
+# 冷启动子进程中执行的代码: 导入核心模块, 并报告是否意外加载了重依赖
+_IMPORT_SNIPPET = """
+import sys, time
+t0 = time.perf_counter()
+import models.battery_model, models.power_model, solver, simulation.simulator
+t1 = time.perf_counter()
+heavy = sorted(m for m in ("pandas", "matplotlib", "seaborn", "scipy") if m in sys.modules)
+print((t1 - t0) * 1e3, ",".join(heavy))
+"""
+
+_FIRST_CASE_SNIPPET = """
+import time
+t0 = time.perf_counter()
+from simulation.init_utils import get_initial_state_by_soh
+from simulation.simulator import run_single_static_test
+y0, ext = get_initial_state_by_soh(0.90)
+run_single_static_test(y0, ext, app_profile_name="gaming_5g", duration=60)
+print((time.perf_counter() - t0) * 1e3)
+"""
+
+
+@contextmanager
+def _in_workdir():
+    """
+    Scanner 和 simulator 通过相对路径读取 Cost.json, 并把 CSV 写到当前目录。
+    在临时目录中运行, 避免覆盖仓库里的结果文件。
+    """
+    old_cwd = os.getcwd()
+    tmp = tempfile.mkdtemp(prefix="spme_bench_")
+    shutil.copy(COST_FILE, os.path.join(tmp, "Cost.json"))
+    os.chdir(tmp)
+    try:
+        yield tmp
+    finally:
+        os.chdir(old_cwd)
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+@contextmanager
+def _quiet():
+    """屏蔽 Scanner 的逐行打印, 避免 I/O 计入耗时"""
+    old_stdout = sys.stdout
+    sys.stdout = open(os.devnull, "w")
+    try:
+        yield
+    finally:
+        sys.stdout.close()
+        sys.stdout = old_stdout
+
+
+def _best_of(func, repeat):
+    """重复运行取最小值 (最能代表无干扰时的真实耗时)"""
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - t0)
+    return min(times)
+
+
+def _typical_ext(profile="gaming_5g"):
+    """构造一个处于放电工况的外部状态, 与 run_single_static_test 第一步一致"""
+    y0, ext = get_initial_state_by_soh(0.90)
+    plan = SimulationPlan(COST_FILE)
+    dev = plan.profiles[profile]
+    ext.P = dev.calculate_power_mw() / 1000.0 / c.N_PARALLEL
+    ext.Q = dev.calculate_heat_mw() / 1000.0
+    ext.I = ext.P / ext.V
+    return np.array(y0, dtype=float), ext
+
+
+# ==========================================
+# 单项基准
+# ==========================================
+
+def bench_derivative(repeat):
+    """单次 derivatives 调用耗时 (us)"""
+    system = BatterySystem()
+    y, ext = _typical_ext()
+    n = 2000
+
+    def loop():
+        for _ in range(n):
+            system.derivatives(0.0, y, ext)
+
+    return _best_of(loop, repeat) / n * 1e6
+
+
+def bench_rk4_step(repeat):
+    """单次 RK4Solver.step (含 calculate_state) 耗时 (us)"""
+    system = BatterySystem()
+    y, ext = _typical_ext()
+    n = 1000
+
+    def loop():
+        solver = RK4Solver(0.0, y)
+        e = ext
+        for _ in range(n):
+            e = solver.step(system, 1.0, e)
+
+    return _best_of(loop, repeat) / n * 1e6
+
+
+def bench_static_profiles(repeat, duration=3600):
+    """每个 Cost.json profile 跑 3600 步静态测试, 返回 {profile: steps/sec}"""
+    plan = SimulationPlan(COST_FILE)
+    results = {}
+    with _in_workdir():
+        for name in plan.profiles:
+            def run():
+                y0, ext = get_initial_state_by_soh(0.90)
+                run_single_static_test(y0, ext, app_profile_name=name, duration=duration)
+
+            results[name] = duration / _best_of(run, repeat)
+    return results
+
+
+def bench_external_scan(soh_levels):
+    """完整外部工况扫描 (SOH x App) 的吞吐量 (cases/min)"""
+    from simulation.scanner import Scanner
+
+    with _in_workdir(), _quiet():
+        # 关闭去重: 测的是每个 case 实际积分的吞吐量
+        scanner = Scanner(dedup=False)
+        n_cases = len(soh_levels) * len(scanner.available_apps)
+        t0 = time.perf_counter()
+        scanner.run_external_scan(soh_levels=soh_levels, duration=3600)
+        elapsed = time.perf_counter() - t0
+    return n_cases / elapsed * 60.0
+
+
+def bench_memory_per_case(duration=3600):
+    """单个 case 的峰值内存分配 (KiB, tracemalloc 统计)"""
+    with _in_workdir():
+        y0, ext = get_initial_state_by_soh(0.90)
+        tracemalloc.start()
+        try:
+            run_single_static_test(y0, ext, app_profile_name="gaming_5g", duration=duration)
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+    return peak / 1024.0
+
+
+def _run_snippet(code, cwd):
+    env = dict(os.environ, PYTHONPATH=project_root)
+    out = subprocess.run([sys.executable, "-c", code], cwd=cwd, env=env,
+                         capture_output=True, text=True, check=True)
+    return out.stdout.split()
+
+
+def bench_startup(repeat):
+    """
+    冷启动延迟 (新进程): 核心模块导入耗时, 以及导入 + 第一个 (60 s) case 的总耗时。
+    同时返回导入核心模块时被加载的重依赖列表 (应为空)。
+    """
+    import_ms, first_ms, heavy = [], [], ""
+    with _in_workdir() as tmp:
+        for _ in range(repeat):
+            fields = _run_snippet(_IMPORT_SNIPPET, tmp)
+            import_ms.append(float(fields[0]))
+            heavy = fields[1] if len(fields) > 1 else ""
+            first_ms.append(float(_run_snippet(_FIRST_CASE_SNIPPET, tmp)[0]))
+    return min(import_ms), min(first_ms), heavy
+
+
+# ==========================================
+# 历史记录与回归检测
+# ==========================================
+
+def _git_revision():
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=project_root, capture_output=True, text=True, timeout=10
+        )
+        return out.stdout.strip() or "unknown"
+    except (OSError, subprocess.SubprocessError):
+        return "unknown"
+
+
+def load_history(path=HISTORY_FILE):
+    if not os.path.exists(path):
+        return []
+    with open(path, "r") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def append_history(entry, path=HISTORY_FILE):
+    with open(path, "a") as f:
+        f.write(json.dumps(entry, sort_keys=True) + "\n")
+
+
+def _direction(metric):
+    if metric in HIGHER_IS_BETTER:
+        return HIGHER_IS_BETTER[metric]
+    # static_steps_per_sec/<profile> 之类的吞吐量指标
+    return "per_sec" in metric or "per_min" in metric
+
+
+def find_regressions(current, baseline, threshold):
+    """
+    对比当前指标与基线, 返回超过阈值的退化列表。
+    threshold: 相对变化阈值 (0.10 即 10%)
+    """
+    regressions = []
+    for metric, value in current.items():
+        base = baseline.get(metric)
+        if base is None or base == 0:
+            continue
+        if _direction(metric):
+            change = (base - value) / base      # 吞吐量下降
+        else:
+            change = (value - base) / base      # 耗时/内存上升
+        if change > threshold:
+            regressions.append((metric, base, value, change))
+    return regressions
+
+
+def run_all(args):
+    metrics = {}
+    print("=== SPMe-P-Aging Benchmarks ===")
+
+    import_ms, first_ms, heavy = bench_startup(args.repeat)
+    metrics["import_core_ms"] = import_ms
+    metrics["first_case_ms"] = first_ms
+    print(f"import core modules      : {import_ms:.1f} ms")
+    print(f"import + first case      : {first_ms:.1f} ms")
+    if heavy:
+        print(f"WARNING: core import loaded heavy dependencies: {heavy}")
+
+    metrics["derivative_eval_us"] = bench_derivative(args.repeat)
+    print(f"derivatives              : {metrics['derivative_eval_us']:.2f} us/call")
+
+    metrics["rk4_step_us"] = bench_rk4_step(args.repeat)
+    print(f"RK4Solver.step           : {metrics['rk4_step_us']:.2f} us/step")
+
+    for name, sps in bench_static_profiles(args.repeat).items():
+        metrics[f"static_steps_per_sec/{name}"] = sps
+        print(f"static 3600s [{name[:15]:<15}]: {sps:,.0f} steps/s")
+
+    if not args.skip_scan:
+        metrics["scan_external_cases_per_min"] = bench_external_scan(args.scan_soh)
+        print(f"external scan            : {metrics['scan_external_cases_per_min']:.1f} cases/min")
+
+    metrics["memory_per_case_kib"] = bench_memory_per_case()
+    print(f"memory per case          : {metrics['memory_per_case_kib']:.1f} KiB peak")
+
+    return metrics
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the simulation core and track regressions.")
+    parser.add_argument("--repeat", type=int, default=3, help="repetitions per micro benchmark (best-of)")
+    parser.add_argument("--scan-soh", type=float, nargs="+", default=[1.0, 0.90, 0.80],
+                        help="SOH levels for the full external scan benchmark")
+    parser.add_argument("--skip-scan", action="store_true", help="skip the full external scan")
+    parser.add_argument("--history", default=HISTORY_FILE, help="JSONL history file")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative regression threshold vs. baseline (default 0.10)")
+    parser.add_argument("--baseline", default=None,
+                        help="revision to compare against (default: most recent entry in history)")
+    parser.add_argument("--no-save", action="store_true", help="do not append this run to the history")
+    args = parser.parse_args(argv)
+
+    # 指定的基准版本不存在时直接报错 (退出码 2), 不跑基准
+    history = load_history(args.history)
+    if args.baseline:
+        candidates = [h for h in history if h.get("revision") == args.baseline]
+        if not candidates:
+            parser.error(f"baseline revision '{args.baseline}' not found in {args.history}")
+    else:
+        candidates = history
+    baseline = candidates[-1] if candidates else None
+
+    metrics = run_all(args)
+
+    entry = {
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "revision": _git_revision(),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "numpy": np.__version__,
+        "metrics": metrics,
+    }
+    if not args.no_save:
+        append_history(entry, args.history)
+        print(f"\nAppended results to {args.history}")
+
+    if baseline is None:
+        print("No baseline in history; nothing to compare.")
+        return 0
+
+    regressions = find_regressions(metrics, baseline["metrics"], args.threshold)
+    print(f"Baseline: {baseline['revision']} ({baseline['timestamp']}), threshold {args.threshold:.0%}")
+    if not regressions:
+        print("No regressions.")
+        return 0
+
+    for metric, base, value, change in regressions:
+        print(f"REGRESSION {metric}: {base:.4g} -> {value:.4g} ({change:+.1%})")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
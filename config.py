@@ -24,6 +24,8 @@ C_MAX_POS = 51217.92      # 正极最大浓度
 T0_POS = 0.4              # 阳离子迁移数
 D_E_REF = 2.0e-10         # 电解液扩散系数参考值
 KAPPA_SEP = 0.164         # 隔膜电导率
+D_S_NEG = 3.9e-14         # 负极固相扩散系数 (仅空间分辨 SPMe 模式使用)
+BRUGG = 1.5               # Bruggeman 系数 (仅空间分辨 SPMe 模式使用)
 
 # --- SEI 相关 ---
 D_SOLV = 2.5e-22
@@ -49,6 +51,14 @@ CP_PHONE = 900.0
 H_CONV = 5.0
 A_SURF = 0.0569           # 冷却面积
 
+# --- 热网络参数 (仅 PackSystem 多电芯模式使用) ---
+C_SOC = 5.0               # SoC 热点热容 (J/K)
+SOC_HEAT_FRACTION = 0.6   # 设备产热中集中在 SoC 热点的比例, 其余进入机身
+G_SOC_BODY = 0.5          # SoC -> 机身 热导 (W/K)
+G_SOC_CELL = 0.05         # SoC -> 最近的电芯 热导 (W/K)
+G_CELL_BODY = 0.1         # 每个电芯 -> 机身 热导 (W/K)
+G_CELL_CELL = 0.2         # 相邻电芯之间 热导 (W/K)
+
 # --- 充电控制参数 ---
 CHARGING_CURRENT_TARGET = -2.5  # A (负数充电)
 CHARGING_VOLTAGE_LIMIT = 4.4    # V
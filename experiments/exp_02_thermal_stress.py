@@ -26,24 +26,20 @@ def run_experiment():
         # 1. 准备初始状态
         y0, ext_init = get_initial_state_by_soh(0.90)
         
-        # 2. 强制修改环境温度 (Hack config)
-        # 注意：这里我们修改全局 config，这在单线程脚本是安全的
-        original_temp = c.T_AMB
-        c.T_AMB = T + 273.15 
-        y0[2] = T + 273.15 # 电池初始温度也同步
+        # 2. 设置环境温度
+        # 注意：BatterySystem 的参数表只从 config 构建一次，运行时修改 c.T_AMB 不再生效，
+        # 因此通过 internal_params 覆盖 T_AMB
+        t_amb = T + 273.15
+        y0[2] = t_amb # 电池初始温度也同步
 
-        try:
-            # 3. 运行
-            rate, real_avg_temp = run_single_static_test(
-                y0, ext_init, 
-                app_profile_name=profile_name, 
-                duration=3600
-            )
-            print(f"{T:<10} | {rate:.2e}        | {real_avg_temp:.2f}")
-            
-        finally:
-            # 4. 恢复环境温度 (好习惯)
-            c.T_AMB = original_temp
+        # 3. 运行
+        rate, real_avg_temp = run_single_static_test(
+            y0, ext_init, 
+            app_profile_name=profile_name, 
+            duration=3600,
+            internal_params={"T_AMB": t_amb}
+        )
+        print(f"{T:<10} | {rate:.2e}        | {real_avg_temp:.2f}")
 
 if __name__ == "__main__":
     run_experiment()
\ No newline at end of file
@@ -10,6 +10,8 @@ sys.path.append(project_root)
 
 from simulation.init_utils import get_initial_state_by_soh
 from simulation.simulator import run_single_static_test
+from simulation.result_store import ResultStore
+from simulation.design import Axis, FullFactorial
 import config as c
 
 def run_experiment():
@@ -28,48 +30,40 @@ def run_experiment():
     
     results = []
     
-    total_iter = len(soh_levels) * len(temps_c) * len(scenarios)
-    print(f"Total iterations: {total_iter}")
-    
-    # 2. 三层嵌套循环 (SOH -> Temp -> Profile)
-    for soh in soh_levels:
-        for T_amb in temps_c:
-            # --- 关键修改：在这里遍历 Profile ---
-            for profile in scenarios: 
-                
-                # 临时修改环境温度
-                original_temp = c.T_AMB
-                c.T_AMB = T_amb + 273.15
-                
-                try:
-                    # 初始化电池状态
-                    y0, ext_init = get_initial_state_by_soh(soh)
-                    y0[2] = c.T_AMB # 强制同步初始温度
-                    
-                    # 运行仿真
-                    # 注意：这里的 app_profile_name 使用的是当前循环变量 profile
-                    rate, avg_batt_temp = run_single_static_test(
-                        y0, ext_init, 
-                        app_profile_name=profile, 
-                        duration=10800 # 3小时
-                    )
-                    
-                    # 记录结果
-                    results.append({
-                        "Scenario": profile,  # 必须记录场景名，画图要用
-                        "SOH_Start": soh,
-                        "Ambient_Temp": T_amb,
-                        "Avg_Battery_Temp": avg_batt_temp,
-                        "Aging_Rate": rate,
-                        "Temp_Rise": avg_batt_temp - T_amb
-                    })
-                    
-                    # 打印进度
-                    print(f"[{profile}] SOH:{soh:.2f} T:{T_amb} -> Rate:{rate:.2e}")
-                    
-                finally:
-                    # 恢复环境温度，防止污染下一次循环
-                    c.T_AMB = original_temp
+    # 2. SOH x Temp x Profile 全因子设计 (惰性逐点生成, 第一个轴变化最慢)
+    design = FullFactorial(Axis("soh", soh_levels), Axis("ambient", temps_c), Axis("profile", scenarios))
+    print(f"Total iterations: {len(design)}")
+
+    for point in design.points():
+        soh, T_amb, profile = point["soh"], point["ambient"], point["profile"]
+
+        # 环境温度通过参数覆盖传入 (不再修改全局 config)
+        t_amb = T_amb + 273.15
+
+        # 初始化电池状态
+        y0, ext_init = get_initial_state_by_soh(soh)
+        y0[2] = t_amb # 强制同步初始温度
+
+        # 运行仿真
+        rate, avg_batt_temp = run_single_static_test(
+            y0, ext_init,
+            app_profile_name=profile,
+            duration=10800, # 3小时
+            internal_params={"T_AMB": t_amb}
+        )
+
+        # 记录结果
+        results.append({
+            "Scenario": profile,  # 必须记录场景名，画图要用
+            "SOH_Start": soh,
+            "Ambient_Temp": T_amb,
+            "Avg_Battery_Temp": avg_batt_temp,
+            "Aging_Rate": rate,
+            "Temp_Rise": avg_batt_temp - T_amb
+        })
+
+        # 打印进度
+        print(f"[{profile}] SOH:{soh:.2f} T:{T_amb} -> Rate:{rate:.2e}")
 
     # 3. 保存结果
     results_dir = os.path.join(project_root, "results")
@@ -78,7 +72,11 @@ def run_experiment():
     df = pd.DataFrame(results)
     csv_path = os.path.join(results_dir, "exp_03_comparison.csv")
     df.to_csv(csv_path, index=False)
-    print(f"\nExperiment Finished. Data saved to: {csv_path}")
+
+    # 同时写出按 (SOH, 环境温度, 场景) 组织的内存映射结果库, 画图脚本按切片读取
+    store_path = os.path.join(results_dir, "exp_03_comparison.store")
+    ResultStore.from_records(store_path, results, dims=("SOH_Start", "Ambient_Temp", "Scenario"))
+    print(f"\nExperiment Finished. Data saved to: {csv_path} and {store_path}")
 
 if __name__ == "__main__":
     run_experiment()
\ No newline at end of file
@@ -7,19 +7,41 @@ import numpy as np
 
 current_dir = os.path.dirname(os.path.abspath(__file__))
 project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
 
-def plot_results():
-    # 1. 读取数据
-    csv_path = os.path.join(project_root, "results", "exp_03_comparison.csv")
-    if not os.path.exists(csv_path):
-        print(f"Error: Data not found at {csv_path}")
-        return
+from simulation.result_store import ResultStore
+
+SCENARIOS = ("5g_gaming_heavy", "idle_baseline")
+LINE_TEMPS = (25, 45)
+
+def load_from_store(store_path):
+    """
+    从内存映射结果库只读取画图需要的切片:
+      - 热力图: 两个场景的 (SOH x 温度) 速率矩阵
+      - 折线图: 25 / 45 度两列
+    """
+    store = ResultStore.open(store_path)
+    soh = store.coords["SOH_Start"]
+    temps = store.coords["Ambient_Temp"]
+
+    rate_5g = store.select("Aging_Rate", Scenario="5g_gaming_heavy")
+    rate_idle = store.select("Aging_Rate", Scenario="idle_baseline")
+    heatmap_data = pd.DataFrame(rate_5g / rate_idle,
+                                index=pd.Index(soh, name="SOH_Start"),
+                                columns=pd.Index(temps, name="Ambient_Temp"))
+
+    line_temps = [t for t in LINE_TEMPS if t in temps]
+    rates = store.select("Aging_Rate", Ambient_Temp=line_temps, Scenario=list(SCENARIOS))
+    target_df = pd.DataFrame([
+        {"SOH_Start": s, "Ambient_Temp": t, "Scenario": sc, "Aging_Rate": rates[i, j, k]}
+        for i, s in enumerate(soh) for j, t in enumerate(line_temps) for k, sc in enumerate(SCENARIOS)
+    ])
+    return heatmap_data, target_df
 
+def load_from_csv(csv_path):
     df = pd.read_csv(csv_path)
-    plots_dir = os.path.join(project_root, "plots")
-    os.makedirs(plots_dir, exist_ok=True)
 
-    # 2. 数据透视：计算加速因子 (Factor = 5G / Idle)
+    # 数据透视：计算加速因子 (Factor = 5G / Idle)
     # 我们需要把长表变成宽表，以便让 5G 的速率除以 Idle 的速率
     df_pivot = df.pivot_table(index=["SOH_Start", "Ambient_Temp"], 
                               columns="Scenario", 
@@ -28,9 +50,30 @@ def plot_results():
     # 计算倍率
     df_pivot["Acceleration_Factor"] = df_pivot["5g_gaming_heavy"] / df_pivot["idle_baseline"]
     
-    # 重置索引，方便 seaborn 绘图
+    # 整理热力图数据矩阵: 行=SOH, 列=Temp, 值=Factor
     df_plot = df_pivot.reset_index()
-    
+    heatmap_data = df_plot.pivot(index="SOH_Start", columns="Ambient_Temp", values="Acceleration_Factor")
+
+    # 为了图表清晰，我们只筛选部分数据画线 (全部画太乱)
+    # 比如只看 25度 (常温) 和 45度 (高温) 的对比
+    target_df = df[df["Ambient_Temp"].isin(LINE_TEMPS)]
+    return heatmap_data, target_df
+
+def plot_results():
+    # 1. 读取数据 (优先使用结果库, 只读取需要的切片; 否则退回 CSV)
+    store_path = os.path.join(project_root, "results", "exp_03_comparison.store")
+    csv_path = os.path.join(project_root, "results", "exp_03_comparison.csv")
+    if os.path.exists(store_path):
+        heatmap_data, target_df = load_from_store(store_path)
+    elif os.path.exists(csv_path):
+        heatmap_data, target_df = load_from_csv(csv_path)
+    else:
+        print(f"Error: Data not found at {store_path} or {csv_path}")
+        return
+
+    plots_dir = os.path.join(project_root, "plots")
+    os.makedirs(plots_dir, exist_ok=True)
+
     # 3. 开始绘图
     sns.set_theme(style="whitegrid")
     plt.rcParams.update({'font.family': 'sans-serif', 'font.size': 11})
@@ -41,8 +84,6 @@ def plot_results():
     # --- 左图: 热力图 (加速因子) ---
     ax1 = fig.add_subplot(gs[0, 0])
     
-    # 整理热力图数据矩阵: 行=SOH, 列=Temp, 值=Factor
-    heatmap_data = df_plot.pivot(index="SOH_Start", columns="Ambient_Temp", values="Acceleration_Factor")
     heatmap_data = heatmap_data.sort_index(ascending=False) # SOH 从高到低
 
     sns.heatmap(heatmap_data, annot=True, fmt=".2f", cmap="Reds", 
@@ -55,10 +96,6 @@ def plot_results():
     # --- 右图: 绝对速率对比 (折线图) ---
     ax2 = fig.add_subplot(gs[0, 1])
     
-    # 为了图表清晰，我们只筛选部分数据画线 (全部画太乱)
-    # 比如只看 25度 (常温) 和 45度 (高温) 的对比
-    target_df = df[df["Ambient_Temp"].isin([25, 45])]
-    
     sns.lineplot(data=target_df, x="SOH_Start", y="Aging_Rate", 
                  hue="Ambient_Temp", style="Scenario",
                  palette={25: "blue", 45: "red"},
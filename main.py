@@ -1,7 +1,323 @@
+import os
 import sys
-from simulation.scanner import Scanner
+import argparse
+
+# 注意: 这里不导入 Scanner / numpy / pandas。
+# 批处理调度会启动大量短任务, 重依赖只在真正执行扫描时才加载。
+
+COMMANDS = ("external", "internal", "matrix", "lifetime", "design", "worker", "verify")
+
+# 各扫描模式的默认设置 (可被 spec 文件和命令行覆盖)
+DEFAULTS = {
+    "external": {
+        "soh_levels": [1.0, 0.90, 0.80],
+        "apps": None,
+        "duration": 3600,
+        "output": "scan_external_results.csv",
+    },
+    "internal": {
+        # 定义想要扫描的参数和倍率
+        "param_dict": {
+            "D_E_REF": [0.5, 1.0, 2.0], #电解液扩散系数
+            "K0": [0.5, 1.0, 2.0] # 反应速率常数
+        },
+        "fixed_soh": 0.90,
+        "fixed_app": "gaming_5g",
+        "duration": 7200,
+        "output": "scan_internal_results.csv",
+    },
+    "matrix": {
+        "soh_levels": None,
+        "ambient_c": None,
+        "apps": None,
+        "duration": 10800,
+        "output": "scan_matrix_results.csv",
+    },
+    "lifetime": {
+        "apps": None,
+        "soh_start": 0.96,
+        "soh_eol": 0.80,
+        "soh_step": 0.02,
+        "duration": 3600,
+        "output": "scan_lifetime_results.csv",
+    },
+    "design": {
+        # 轴: soh / ambient (C) / profile / duration / 任意 config 参数; lhs 连续轴写 {low, high}
+        "kind": "factorial",
+        "axes": {
+            "soh": [0.90, 0.80],
+            "ambient": [25, 45],
+            "profile": ["idle_baseline", "5g_gaming_heavy"],
+        },
+        "samples": 100,
+        "seed": None,
+        "duration": 3600,
+        "output": "scan_design_results.csv",
+    },
+}
+
+
+def load_spec(path):
+    """
+    读取扫描规格文件 (.toml / .yaml / .yml / .json)。
+    顶层可包含 workers, solver, profile, trace 以及各模式同名的小节, 例如:
+
+        workers = 4
+        [solver]
+        name = "rk45"
+        rtol = 1e-6
+        [external]
+        soh_levels = [1.0, 0.9, 0.8]
+        duration = 3600
+    """
+    ext = os.path.splitext(path)[1].lower()
+    if ext == ".toml":
+        import tomllib
+        with open(path, "rb") as f:
+            return tomllib.load(f)
+    if ext in (".yaml", ".yml"):
+        import yaml
+        with open(path, "r") as f:
+            return yaml.safe_load(f) or {}
+    if ext == ".json":
+        import json
+        with open(path, "r") as f:
+            return json.load(f)
+    raise ValueError(f"Unsupported spec format '{ext}' (use .toml, .yaml or .json)")
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        prog="main.py",
+        description="Battery aging simulation scans. Run without arguments for the interactive menu."
+    )
+    sub = parser.add_subparsers(dest="command")
+
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--spec", help="scan specification file (.toml / .yaml / .json)")
+    common.add_argument("--workers", type=int, help="number of worker processes (default 1)")
+    common.add_argument("--output", help="output CSV path, or a directory ending in .store for a "
+                                           "memory-mapped result store")
+    common.add_argument("--solver", choices=["rk4", "rk45", "bdf"], help="integrator (default rk4)")
+    common.add_argument("--model", choices=["lumped", "spme", "pack"],
+                        help="lumped SPMe (default), spatially resolved SPMe (use with --solver bdf) "
+                             "or parallel cells with a pack/phone thermal network")
+    common.add_argument("--nodes", type=int, help="finite-volume nodes per domain for --model spme")
+    common.add_argument("--cells", type=int, help="number of parallel cells for --model pack")
+    common.add_argument("--dt", type=float, help="step size in s (max step for adaptive solvers)")
+    common.add_argument("--rtol", type=float, help="relative tolerance (adaptive solvers)")
+    common.add_argument("--atol", type=float, help="absolute tolerance (adaptive solvers)")
+    common.add_argument("--duration", type=float, help="simulated seconds per case")
+    common.add_argument("--quasi-static", action="store_true", default=None, dest="quasi_static",
+                        help="solve the thermal steady state directly, integrate the drift over the full duration "
+                             "adaptively and correct for the warm-up (static loads; falls back to the full "
+                             "transient if the warm-up check fails)")
+    common.add_argument("--continuation", action="store_true", default=None,
+                        help="warm-start each case from the final temperature / concentration state of its "
+                             "neighbour along the scan axes and correct the result for the skipped warm-up "
+                             "(only saves time together with --stop-rtol)")
+    common.add_argument("--warm-rtol", type=float, dest="warm_rtol",
+                        help="accuracy guard for --continuation: max estimated relative error of the warm-up "
+                             "correction before falling back to a cold start (default 0.01)")
+    common.add_argument("--chain-length", type=int, dest="chain_length",
+                        help="max cases per continuation chain; each chain starts cold (default 16)")
+    common.add_argument("--stop-rtol", type=float, dest="stop_rtol",
+                        help="stop a case early once the aging-rate trend and temperature have converged "
+                             "(relative tolerance, e.g. 0.01); the rest of the duration is extrapolated")
+    common.add_argument("--stop-window", type=float, dest="stop_window",
+                        help="convergence check window in s for --stop-rtol (default 600)")
+    common.add_argument("--stop-temp-tol", type=float, dest="stop_temp_tol",
+                        help="max temperature change in K over the last window for --stop-rtol (default 0.01)")
+    common.add_argument("--profile", action="store_true", default=None, help="collect per-case timing counters")
+    common.add_argument("--trace", help="write a Chrome trace JSON to this path")
+    common.add_argument("--backend", choices=["local", "distributed"],
+                        help="local: in-process / process pool; distributed: work-unit queue")
+    common.add_argument("--queue", help="SQLite queue file for the distributed backend")
+    common.add_argument("--lease", type=float,
+                        help="work-unit lease in s for local distributed workers (renewed by a heartbeat "
+                             "while a case runs; default 600)")
+    common.add_argument("--no-dedup", action="store_false", default=None, dest="dedup",
+                        help="simulate every case even when its effective inputs repeat")
+
+    p = sub.add_parser("external", parents=[common], help="SOH x App scan")
+    p.add_argument("--soh", type=float, nargs="+", dest="soh_levels")
+    p.add_argument("--apps", nargs="+")
+
+    p = sub.add_parser("internal", parents=[common], help="parameter sensitivity scan")
+    p.add_argument("--param", action="append", metavar="NAME=M1,M2,...",
+                   help="parameter and multipliers, may be repeated (e.g. K0=0.5,1,2)")
+    p.add_argument("--soh", type=float, dest="fixed_soh")
+    p.add_argument("--app", dest="fixed_app")
+
+    p = sub.add_parser("matrix", parents=[common], help="SOH x ambient x App scan")
+    p.add_argument("--soh", type=float, nargs="+", dest="soh_levels")
+    p.add_argument("--ambient", type=float, nargs="+", dest="ambient_c", help="ambient temperatures in C")
+    p.add_argument("--apps", nargs="+")
+
+    p = sub.add_parser("lifetime", parents=[common], help="integrated time to end of life")
+    p.add_argument("--apps", nargs="+")
+    p.add_argument("--soh-start", type=float, dest="soh_start")
+    p.add_argument("--soh-eol", type=float, dest="soh_eol")
+    p.add_argument("--soh-step", type=float, dest="soh_step")
+
+    p = sub.add_parser("design", parents=[common], help="generic N-dimensional scan design")
+    p.add_argument("--axis", action="append", metavar="NAME=V1,V2,...",
+                   help="named axis (soh, ambient, profile, duration or a config parameter), may be "
+                        "repeated; use NAME=LOW:HIGH for a continuous range with --kind lhs")
+    p.add_argument("--kind", choices=["factorial", "zip", "oat", "lhs"],
+                   help="full factorial (default), zip, one-at-a-time or Latin hypercube")
+    p.add_argument("--samples", type=int, help="number of Latin hypercube samples")
+    p.add_argument("--seed", type=int, help="random seed for --kind lhs")
+
+    p = sub.add_parser("worker", help="run a distributed scan worker against a queue")
+    p.add_argument("--queue", required=True, help="SQLite queue file shared with the submitting scan")
+    p.add_argument("--lease", type=float, default=600.0, help="lease duration per work unit in s")
+    p.add_argument("--poll", type=float, default=1.0, help="poll interval when the queue is empty")
+    p.add_argument("--forever", action="store_true", help="keep polling after the queue drains")
+
+    p = sub.add_parser("verify", help="replay a sample of saved results on the serial RK4 reference path")
+    p.add_argument("results", help="result CSV or .store directory written by a scan")
+    p.add_argument("--sample", type=int, default=10, help="number of cases to replay (default 10)")
+    p.add_argument("--seed", type=int, default=0, help="random seed for the sample")
+    p.add_argument("--rtol", type=float,
+                   help="fail (exit code 1) if the relative aging-rate deviation exceeds this value")
+
+    return parser
+
+
+def _parse_param_plan(items):
+    plan = {}
+    for item in items:
+        name, _, mults = item.partition("=")
+        if not mults:
+            raise SystemExit(f"--param expects NAME=M1,M2,... (got '{item}')")
+        plan[name.strip()] = [float(m) for m in mults.split(",")]
+    return plan
+
+
+def _parse_axes(items):
+    def value(v):
+        try:
+            return float(v)
+        except ValueError:
+            return v.strip()
+
+    axes = {}
+    for item in items:
+        name, _, values = item.partition("=")
+        if not values:
+            raise SystemExit(f"--axis expects NAME=V1,V2,... or NAME=LOW:HIGH (got '{item}')")
+        if ":" in values:
+            low, high = values.split(":")
+            axes[name.strip()] = {"low": float(low), "high": float(high)}
+        else:
+            axes[name.strip()] = [value(v) for v in values.split(",")]
+    return axes
+
+
+def resolve_settings(args):
+    """合并默认值 < spec 文件 < 命令行参数, 返回 (扫描参数, 运行参数)"""
+    spec = load_spec(args.spec) if args.spec else {}
+
+    scan = dict(DEFAULTS[args.command])
+    scan.update(spec.get(args.command, {}))
+    # spec 中 internal 小节也可以用 "params" 作为 param_dict 的别名
+    if "params" in scan:
+        scan["param_dict"] = scan.pop("params")
+
+    solver = dict(spec.get("solver", {}))
+    model = dict(spec.get("model", {}))
+    run = {
+        "workers": spec.get("workers", 1),
+        "profile": spec.get("profile", False),
+        "trace": spec.get("trace"),
+        "backend": spec.get("backend", "local"),
+        "queue": spec.get("queue", "scan_queue.sqlite"),
+        "lease": spec.get("lease", 600.0),
+        "dedup": spec.get("dedup", True),
+    }
+    if "output" in spec:
+        scan["output"] = spec["output"]
+
+    # 命令行覆盖
+    for key in ("soh_levels", "apps", "ambient_c", "fixed_soh", "fixed_app",
+                "soh_start", "soh_eol", "soh_step", "duration", "output", "kind", "samples", "seed"):
+        value = getattr(args, key, None)
+        if value is not None:
+            scan[key] = value
+    if getattr(args, "param", None):
+        scan["param_dict"] = _parse_param_plan(args.param)
+    if getattr(args, "axis", None):
+        scan["axes"] = _parse_axes(args.axis)
+
+    for key, opt in (("name", "solver"), ("dt", "dt"), ("rtol", "rtol"), ("atol", "atol")):
+        value = getattr(args, opt)
+        if value is not None:
+            solver[key] = value
+    if args.quasi_static:
+        solver["quasi_static"] = True
+    if args.continuation:
+        solver["continuation"] = True
+    for key in ("warm_rtol", "chain_length", "stop_rtol", "stop_window", "stop_temp_tol"):
+        value = getattr(args, key)
+        if value is not None:
+            solver[key] = value
+    if args.model is not None:
+        model["name"] = args.model
+    if args.nodes is not None:
+        model["n_r"] = model["n_x"] = args.nodes
+    if args.cells is not None:
+        model["n_cells"] = args.cells
+    for key in ("workers", "profile", "trace", "backend", "queue", "lease", "dedup"):
+        value = getattr(args, key)
+        if value is not None:
+            run[key] = value
+
+    run["solver_options"] = solver or None
+    run["model_options"] = model or None
+    return scan, run
+
+
+def run_command(command, scan, run):
+    from simulation.scanner import Scanner
+
+    backend = None
+    workers = run["workers"]
+    if run["backend"] == "distributed":
+        from simulation.distributed import DistributedBackend, SQLiteWorkQueue
+        # 分布式模式下 --workers 表示本机额外启动的 worker 进程数 (0 = 只等待远程 worker)
+        backend = DistributedBackend(SQLiteWorkQueue(run["queue"]), local_workers=workers,
+                                     lease_seconds=run["lease"])
+        workers = 1
+
+    scanner = Scanner(
+        profile=run["profile"],
+        trace_path=run["trace"],
+        workers=workers,
+        solver_options=run["solver_options"],
+        model_options=run["model_options"],
+        backend=backend,
+        dedup=run["dedup"],
+    )
+    if command == "design":
+        from simulation.design import make_design
+        scan = dict(scan)
+        design = make_design(scan.pop("kind"), scan.pop("axes"), samples=scan.pop("samples"),
+                             seed=scan.pop("seed"))
+        return scanner.run_design(design, **scan)
+
+    method = {
+        "external": scanner.run_external_scan,
+        "internal": scanner.run_internal_scan,
+        "matrix": scanner.run_matrix_scan,
+        "lifetime": scanner.run_lifetime_scan,
+    }[command]
+    return method(**scan)
+
+
+def interactive():
+    from simulation.scanner import Scanner
 
-def main(): 
     scanner = Scanner()
     print("=== Battery Aging Simulation System ===")
     print("1. App & SOH Matrix Scan (External Conditions)")
@@ -11,28 +327,48 @@ def main():
     choice = input("select mode (1/2/3): ").strip()
 
     # === 外部工况扫描 ===
-    if choice == '1' or choice == '3': 
+    if choice == '1' or choice == '3':
         print("\n>>> Running App Scan...")
-        scanner.run_external_scan(
-            soh_levels = [1.0, 0.90, 0.80], 
-            duration = 3600
-        )
+        scanner.run_external_scan(**DEFAULTS["external"])
 
     # === 内部参数扫描 ===
-    if choice == '2' or choice == '3': 
+    if choice == '2' or choice == '3':
         print("\n>>>Running Sensitivity Scan...")
-        # 定义想要扫描的参数和倍率
-        sensitivity_plan = {
-            "D_E_REF": [0.5, 1.0, 2.0], #电解液扩散系数
-            "K0": [0.5, 1.0, 2.0] # 反应速率常数
-        }
+        scanner.run_internal_scan(**DEFAULTS["internal"])
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv:
+        # 兼容旧的交互式菜单
+        interactive()
+        return 0
+
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command is None:
+        parser.print_help()
+        return 2
+
+    if args.command == "worker":
+        from simulation.distributed import SQLiteWorkQueue, run_worker
+        n = run_worker(SQLiteWorkQueue(args.queue), lease_seconds=args.lease, poll=args.poll,
+                       exit_when_idle=not args.forever)
+        print(f"Worker finished {n} work units.")
+        return 0
+
+    if args.command == "verify":
+        from simulation.provenance import load_records, check_reproducibility
+        result = check_reproducibility(load_records(args.results), sample=args.sample, seed=args.seed)
+        if args.rtol is not None and not result["max_rate_rel_dev"] <= args.rtol:
+            print(f"Reproducibility check failed: deviation exceeds rtol={args.rtol:g}")
+            return 1
+        return 0
+
+    scan, run = resolve_settings(args)
+    run_command(args.command, scan, run)
+    return 0
 
-        scanner.run_internal_scan(
-            param_dict = sensitivity_plan, 
-            fixed_soh = 0.90, 
-            fixed_app = "gaming_5g", 
-            duration = 7200
-        )
 
-if __name__ == "__main__": 
-    main(); 
\ No newline at end of file
+if __name__ == "__main__":
+    sys.exit(main())
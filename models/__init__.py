@@ -0,0 +1,17 @@
+def make_system(param_overrides=None, name="lumped", **options):
+    """
+    按名称构造电池模型。
+    lumped: 集总 SPMe (BatterySystem, 默认)
+    spme:   空间分辨 SPMe (SpatialBatterySystem), options 可包含 n_r / n_x
+    pack:   多电芯并联 + 热网络 (PackSystem), options 可包含 n_cells / cell_spread / cell_params
+    """
+    if name == "lumped":
+        from models.battery_model import BatterySystem
+        return BatterySystem(param_overrides=param_overrides)
+    if name == "spme":
+        from models.spme_model import SpatialBatterySystem
+        return SpatialBatterySystem(param_overrides=param_overrides, **options)
+    if name == "pack":
+        from models.pack_model import PackSystem
+        return PackSystem(param_overrides=param_overrides, **options)
+    raise ValueError(f"Unknown model '{name}', choose from ['lumped', 'spme', 'pack']")
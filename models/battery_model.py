@@ -2,8 +2,23 @@
 
 import numpy as np
 import config as c
+from types import MappingProxyType
+from typing import Optional
 from dataclasses import dataclass
 
+_BASE_PARAMS = None
+
+def base_params():
+    """
+    config.py 中全部大写常量组成的只读参数表。
+    只在第一次调用时构建一次, 之后所有 BatterySystem 共享同一个对象。
+    注意: 构建后再修改 config 模块不会反映到这里, 需要改参数请用 param_overrides。
+    """
+    global _BASE_PARAMS
+    if _BASE_PARAMS is None:
+        _BASE_PARAMS = MappingProxyType({k: getattr(c, k) for k in dir(c) if k.isupper()})
+    return _BASE_PARAMS
+
 @dataclass
 class ExternalState:
     I: float = 0.0
@@ -19,13 +34,23 @@ class ExternalState:
     # 新增监控字段
     Phi_Anode: float = 0.1  # 负极电位
     I_Plating: float = 0.0  # 析锂电流
+    # 多电芯模式 (PackSystem) 下每个电芯各自的外部状态, 单电芯模型为 None
+    cells: Optional[list] = None
 
 class BatterySystem:
+    # 自适应求解器的逐分量绝对容差 (与状态向量 y 的 7 个分量一一对应)
+    # L_SEI ~ 1e-8 m, Q_rev/Q_dead ~ 0 C, 需要比浓度/温度小得多的容差
+    ATOL = np.array([1e-3, 1e-3, 1e-6, 1e-16, 1e-6, 1e-10, 1e-10])
+    # 温度在状态向量中的位置 (simulator 用它记录温度)
+    IDX_T = 2
+    # 快变量 (温度, 动态浓差): 准静态模式中对它们求稳态, 其余状态视为冻结
+    IDX_FAST = [2, 4]
+
     def __init__(self, param_overrides=None):
-        # 初始化参数字典，支持扫描
-        self.p = {k: getattr(c, k) for k in dir(c) if not k.startswith("__")}
+        # 初始化参数字典，支持扫描 (无覆盖时直接共享只读的基础参数表)
+        self.p = base_params()
         if param_overrides:
-            self.p.update(param_overrides)
+            self.p = MappingProxyType({**self.p, **param_overrides})
 
         # 几何参数预计算
         self.Asurf_n = self.p['AREA'] * self.p['L_NEG'] * 3.0 * self.p['EPS_S_NEG'] / self.p['R_S_NEG']
@@ -45,9 +70,58 @@ class BatterySystem:
         c_s_bar, c_e_bar, T, L_SEI, delta_ce_dyn, Q_rev, Q_dead = y
         p = self.p
 
+        # --- 1/2. 负极电位与析锂/回溶 ---
+        phi_anode, i_plating, i_intercalation = self._anode_reaction(
+            c_e_bar - delta_ce_dyn, c_s_bar, T, L_SEI, Q_rev, ext)
+
+        # --- 3. 状态方程 ---
+        
+        # [0] d(c_s)/dt: 仅受嵌入电流影响
+        dcs_dt = -i_intercalation / (p['EPS_S_NEG'] * ext.SOH) / c.F / p['L_NEG'] / p['AREA']
+        
+        # [1] d(c_e)/dt: 假设析锂不显著影响电解液浓度分布(简化)
+        dce_dt = (1.0 - p['T0_POS']) / (c.EPS_E * c.F) * (ext.I / p['L_POS'] - ext.I / p['L_NEG'])
+        
+        # [2] d(T)/dt
+        heat_gen = (ext.I**2 * ext.R_tot * c.N_PARALLEL) + ext.Q
+        heat_diss = c.H_CONV * c.A_SURF * (T - p['T_AMB'])
+        dT_dt = (heat_gen - heat_diss) / (c.MASS_PHONE * c.CP_PHONE)
+
+        # [3] d(L_SEI)/dt
+        # Arrhenius 温度修正
+        arrhenius = np.exp(-3000.0 * (1.0/T - 1.0/298.15))
+        d_lsei_dt = c_s_bar * p['D_SOLV'] * arrhenius * p['V_SEI'] / 2.0 / L_SEI
+        
+        # [4] d(Delta_Ce)/dt
+        delta_ce_target = (1.0 - p['T0_POS']) / (2.0 * c.F * ext.D_e) * (ext.I * p['L_SEP'])
+        tau_diff = (self.L_total**2) / (20.0 * ext.D_e)
+        d_delta_ce_dt = (delta_ce_target - delta_ce_dyn) / tau_diff
+
+        # [5] d(Q_rev)/dt (可逆析锂)
+        # 死锂转化率
+        gamma = p['GAMMA_0'] * (p['L_SEI_0'] / L_SEI)
+        decay_rate = gamma * Q_rev
+        
+        # i_plating 为负是生成，为正是消耗
+        # 公式: 变化率 = -(生成/消耗电流) - 死锂转化
+        d_qrev_dt = -i_plating - decay_rate
+
+        # [6] d(Q_dead)/dt (死锂堆积)
+        d_qdead_dt = decay_rate
+
+        return np.array([dcs_dt, dce_dt, dT_dt, d_lsei_dt, d_delta_ce_dt, d_qrev_dt, d_qdead_dt])
+
+    def _anode_reaction(self, c_e_local, c_s, T, L_SEI, Q_rev, ext):
+        """
+        负极电位与析锂/回溶电流分配。
+        c_e_local: 负极侧电解液浓度, c_s: 负极颗粒 (表面) 锂浓度
+        返回 (phi_anode, i_plating, i_intercalation)
+        """
+        p = self.p
+
         # --- 1. 负极电位计算 (用于判断析锂) ---
         # 交换电流密度
-        term_n = max(1e-9, (c_e_bar - delta_ce_dyn) * c_s_bar * (p['C_MAX_NEG'] - c_s_bar))
+        term_n = max(1e-9, c_e_local * c_s * (p['C_MAX_NEG'] - c_s))
         i_0n = p['K0'] * ext.AGEING * (term_n ** p['ALPHA'])
         
         # 过电势 Eta_n
@@ -57,7 +131,7 @@ class BatterySystem:
         eta_n = (2.0 * c.R * T / c.F) * np.arcsinh(arg_n)
         
         # 平衡电位 U_n
-        theta_n = np.clip(c_s_bar / p['C_MAX_NEG'], 0.001, 0.999)
+        theta_n = np.clip(c_s / p['C_MAX_NEG'], 0.001, 0.999)
         u_n = self._ocv_neg(theta_n)
         
         # SEI 膜压降
@@ -88,42 +162,11 @@ class BatterySystem:
             i_plating = ext.I # 正值，表示金属锂变回锂离子
             i_intercalation = 0.0
 
-        # --- 3. 状态方程 ---
-        
-        # [0] d(c_s)/dt: 仅受嵌入电流影响
-        dcs_dt = -i_intercalation / (p['EPS_S_NEG'] * ext.SOH) / c.F / p['L_NEG'] / p['AREA']
-        
-        # [1] d(c_e)/dt: 假设析锂不显著影响电解液浓度分布(简化)
-        dce_dt = (1.0 - p['T0_POS']) / (c.EPS_E * c.F) * (ext.I / p['L_POS'] - ext.I / p['L_NEG'])
-        
-        # [2] d(T)/dt
-        heat_gen = (ext.I**2 * ext.R_tot * c.N_PARALLEL) + ext.Q
-        heat_diss = c.H_CONV * c.A_SURF * (T - c.T_AMB)
-        dT_dt = (heat_gen - heat_diss) / (c.MASS_PHONE * c.CP_PHONE)
+        return phi_anode, i_plating, i_intercalation
 
-        # [3] d(L_SEI)/dt
-        # Arrhenius 温度修正
-        arrhenius = np.exp(-3000.0 * (1.0/T - 1.0/298.15))
-        d_lsei_dt = c_s_bar * p['D_SOLV'] * arrhenius * p['V_SEI'] / 2.0 / L_SEI
-        
-        # [4] d(Delta_Ce)/dt
-        delta_ce_target = (1.0 - p['T0_POS']) / (2.0 * c.F * ext.D_e) * (ext.I * p['L_SEP'])
-        tau_diff = (self.L_total**2) / (20.0 * ext.D_e)
-        d_delta_ce_dt = (delta_ce_target - delta_ce_dyn) / tau_diff
-
-        # [5] d(Q_rev)/dt (可逆析锂)
-        # 死锂转化率
-        gamma = p['GAMMA_0'] * (p['L_SEI_0'] / L_SEI)
-        decay_rate = gamma * Q_rev
-        
-        # i_plating 为负是生成，为正是消耗
-        # 公式: 变化率 = -(生成/消耗电流) - 死锂转化
-        d_qrev_dt = -i_plating - decay_rate
-
-        # [6] d(Q_dead)/dt (死锂堆积)
-        d_qdead_dt = decay_rate
-
-        return np.array([dcs_dt, dce_dt, dT_dt, d_lsei_dt, d_delta_ce_dt, d_qrev_dt, d_qdead_dt])
+    def temperature(self, y: np.ndarray) -> float:
+        """状态向量中代表电池温度的量 (K)"""
+        return y[self.IDX_T]
 
     def calculate_state(self, t: float, y: np.ndarray, ext: ExternalState) -> ExternalState:
         new_ext = ExternalState(**ext.__dict__)
@@ -0,0 +1,260 @@
+# models/pack_model.py
+
+import numpy as np
+import config as c
+from dataclasses import replace
+from models.battery_model import BatterySystem, ExternalState
+
+class PackSystem:
+    """
+    多电芯并联 + 整机热网络模型。
+
+    与集总模型把 N_PARALLEL 个电芯视为完全相同不同, 这里每个电芯有独立的电化学状态,
+    并联电流按端电压相等联立求解:
+        V = U_i - I_i R_i,   sum(I_i) = I_pack
+    热网络节点: 各电芯, 机身, SoC 热点; 环境温度为边界条件:
+        C dT/dt = Q - K T + g_amb T_amb
+    K 是 (n+2)x(n+2) 的对称导纳矩阵 (链式电芯 + 机身 + SoC), 节点很少, 直接用稠密矩阵。
+
+    状态向量布局:
+      y[6i:6i+6]   电芯 i 的 [c_s_bar, c_e_bar, L_SEI, delta_ce_dyn, Q_rev, Q_dead]
+      y[6n:7n]     各电芯温度
+      y[7n]        机身温度
+      y[7n+1]      SoC 热点温度
+    """
+    N_CELL_STATES = 6
+    # 电芯状态在集总 7 维向量中的位置 (去掉温度 y[2])
+    _LUMPED_IDX = [0, 1, 3, 4, 5, 6]
+    # 允许逐电芯不同的参数 (cell_spread / cell_params 可以作用于这些参数)
+    _VECTOR_PARAMS = ('C_MAX_NEG', 'K0', 'ALPHA', 'KAPPA_SEI', 'ALPHA_PLATING', 'K_PLATING', 'AREA',
+                      'EPS_S_NEG', 'L_NEG', 'L_POS', 'L_SEP', 'T0_POS', 'D_SOLV', 'V_SEI',
+                      'GAMMA_0', 'L_SEI_0', 'EPS_E')
+
+    def __init__(self, param_overrides=None, n_cells=None, cell_spread=None, cell_params=None):
+        """
+        n_cells:     并联电芯数 (默认 config.N_PARALLEL)
+        cell_spread: {参数名: 相对离散度}, 第 i 个电芯取倍率 1 + s*(2i/(n-1) - 1), 用于模拟制造差异
+        cell_params: 每个电芯单独的参数覆盖列表 (优先级最高)
+        """
+        self.n_cells = int(n_cells or c.N_PARALLEL)
+        n = self.n_cells
+
+        base = BatterySystem(param_overrides)
+        self.p = base.p
+        overrides = [dict(param_overrides or {}) for _ in range(n)]
+        for name, spread in (cell_spread or {}).items():
+            for i in range(n):
+                offset = (2.0 * i / (n - 1) - 1.0) if n > 1 else 0.0
+                overrides[i][name] = self.p[name] * (1.0 + spread * offset)
+        for i, extra in enumerate(cell_params or []):
+            overrides[i].update(extra)
+        self.cells = [BatterySystem(o) if o else base for o in overrides]
+
+        # 逐电芯参数数组, derivatives 中对所有电芯做向量化计算
+        self.P = {k: np.array([cell.p[k] for cell in self.cells]) for k in self._VECTOR_PARAMS}
+        self.Asurf_n = np.array([cell.Asurf_n for cell in self.cells])
+        self.L_total = np.array([cell.L_total for cell in self.cells])
+
+        # 每个电芯的额定容量, 用于容量加权 SOH
+        P = self.P
+        self.q_nominal = P['EPS_S_NEG'] * c.F * P['L_NEG'] * P['AREA'] * P['C_MAX_NEG']
+
+        self._build_thermal_network()
+
+        self.IDX_TCELL = self.N_CELL_STATES * n
+        self.IDX_T = self.IDX_TCELL  # 第一个电芯的温度
+        self.IDX_BODY = self.IDX_TCELL + n
+        self.IDX_SOC = self.IDX_BODY + 1
+        self.n_states = self.IDX_SOC + 1
+        # 快变量: 各电芯动态浓差 + 所有热节点
+        self.IDX_FAST = list(range(3, self.IDX_TCELL, self.N_CELL_STATES)) + list(range(self.IDX_TCELL, self.n_states))
+        self.ATOL = np.concatenate([
+            np.tile(BatterySystem.ATOL[self._LUMPED_IDX], n),
+            np.full(n + 2, 1e-6),
+        ])
+
+    # ==========================================
+    # 热网络
+    # ==========================================
+
+    def _build_thermal_network(self):
+        p = self.p
+        n = self.n_cells
+        body, soc = n, n + 1
+        K = np.zeros((n + 2, n + 2))
+
+        def link(a, b, g):
+            K[a, a] += g; K[b, b] += g
+            K[a, b] -= g; K[b, a] -= g
+
+        for i in range(n - 1):
+            link(i, i + 1, p['G_CELL_CELL'])
+        for i in range(n):
+            link(i, body, p['G_CELL_BODY'])
+        link(soc, body, p['G_SOC_BODY'])
+        link(soc, 0, p['G_SOC_CELL']) # SoC 热点靠近第一个电芯
+
+        # 只有机身与环境对流换热
+        self.g_amb = np.zeros(n + 2)
+        self.g_amb[body] = p['H_CONV'] * p['A_SURF']
+        K[body, body] += self.g_amb[body]
+        self.K = K
+
+        c_cell = p['MASS_BATT'] * p['CP_BATT'] / n
+        c_body = p['MASS_PHONE'] * p['CP_PHONE'] - p['MASS_BATT'] * p['CP_BATT'] - p['C_SOC']
+        self.heat_cap = np.concatenate([np.full(n, c_cell), [c_body, p['C_SOC']]])
+
+    def _node_heat(self, I_cells, R_cells, q_device):
+        """各热节点的产热 (W): 电芯焦耳热 + 设备产热按比例分给 SoC / 机身"""
+        frac = self.p['SOC_HEAT_FRACTION']
+        return np.concatenate([I_cells**2 * R_cells, [(1.0 - frac) * q_device, frac * q_device]])
+
+    def thermal_steady_state(self, I_cells, R_cells, q_device):
+        """给定产热时热网络的稳态温度: K T = Q + g_amb T_amb"""
+        rhs = self._node_heat(I_cells, R_cells, q_device) + self.g_amb * self.p['T_AMB']
+        return np.linalg.solve(self.K, rhs)
+
+    # ==========================================
+    # 并联电流分配
+    # ==========================================
+
+    def _cell_ocv(self, c_s_bar):
+        """
+        与 BatterySystem.calculate_state 中的端电压估算一致 (不含 IR 压降), 对所有电芯向量化。
+        返回 (开路电压, 负极平衡电位 u_n), u_n 在 derivatives 中复用
+        """
+        cell = self.cells[0]
+        theta_n = np.clip(c_s_bar / self.P['C_MAX_NEG'], 0.001, 0.999)
+        theta_p = np.clip(0.4 + 0.585 * (0.99 - theta_n), 0.001, 0.999)
+        u_n = cell._ocv_neg(theta_n)
+        return cell._ocv_pos(theta_p) - u_n + 0.1, u_n
+
+    @staticmethod
+    def share_current(U, R, I_pack):
+        """
+        端电压相等约束下的并联电流分配 (闭式解)。
+        U / R: 各电芯开路电压和内阻; 返回 (各电芯电流, 端电压)
+        """
+        G = 1.0 / R
+        V = (np.dot(G, U) - I_pack) / G.sum()
+        return (U - V) * G, V
+
+    # ==========================================
+    # 状态转换
+    # ==========================================
+
+    def initial_state(self, y0_lumped):
+        """由集总模型的 7 维初值构造: 每个电芯相同, 所有热节点取初始温度"""
+        y0_lumped = np.asarray(y0_lumped, dtype=float)
+        cell = y0_lumped[self._LUMPED_IDX]
+        return np.concatenate([np.tile(cell, self.n_cells), np.full(self.n_cells + 2, y0_lumped[2])])
+
+    def temperature(self, y):
+        """电芯平均温度 (K)"""
+        return y[self.IDX_TCELL:self.IDX_BODY].mean()
+
+    def _split(self, y):
+        X = y[:self.IDX_TCELL].reshape(self.n_cells, self.N_CELL_STATES)
+        return X, y[self.IDX_TCELL:]
+
+    def _cell_vector(self, X, i, T):
+        c_s, c_e, L_SEI, dce, q_rev, q_dead = X[i]
+        return np.array([c_s, c_e, T, L_SEI, dce, q_rev, q_dead])
+
+    # ==========================================
+    # 方程
+    # ==========================================
+
+    def derivatives(self, t: float, y: np.ndarray, ext: ExternalState) -> np.ndarray:
+        """
+        所有电芯的电化学方程按数组一次算完 (与 BatterySystem.derivatives 逐项对应),
+        避免逐电芯调用带来的 Python 开销。
+        """
+        P = self.P
+        X, T_nodes = self._split(y)
+        c_s, c_e, L_SEI, delta_ce, Q_rev, Q_dead = X.T
+        T = T_nodes[:self.n_cells]
+
+        cell_exts = ext.cells or [ext] * self.n_cells
+        SOH = np.array([e.SOH for e in cell_exts])
+        AGEING = np.array([e.AGEING for e in cell_exts])
+        D_e = np.array([e.D_e for e in cell_exts])
+        R_cells = np.array([e.R_tot for e in cell_exts])
+
+        U, u_n = self._cell_ocv(c_s)
+        I, _ = self.share_current(U, R_cells, ext.I * c.N_PARALLEL)
+
+        # --- 负极电位 (见 BatterySystem._anode_reaction) ---
+        term_n = np.maximum(1e-9, (c_e - delta_ce) * c_s * (P['C_MAX_NEG'] - c_s))
+        i_0n = P['K0'] * AGEING * (term_n ** P['ALPHA'])
+        arg_n = (I / self.Asurf_n) / (2.0 * np.maximum(i_0n, 1e-9))
+        eta_n = (2.0 * c.R * T / c.F) * np.arcsinh(arg_n)
+        phi_anode = u_n + eta_n + I * L_SEI / (self.Asurf_n * P['KAPPA_SEI'])
+
+        # --- 析锂 / 回溶 ---
+        plating = phi_anode < 0.0
+        stripping = ~plating & (I > 0.0) & (Q_rev > 1e-5)
+        exp_term = np.exp(-P['ALPHA_PLATING'] * c.F * np.minimum(phi_anode, 0.0) / (c.R * T))
+        i_plating = np.where(plating, -P['K_PLATING'] * P['AREA'] * exp_term, np.where(stripping, I, 0.0))
+        i_intercalation = np.where(stripping, 0.0, I - i_plating)
+
+        # --- 状态方程 ---
+        dy = np.empty(self.n_states)
+        D = dy[:self.IDX_TCELL].reshape(self.n_cells, self.N_CELL_STATES)
+        D[:, 0] = -i_intercalation / (P['EPS_S_NEG'] * SOH) / c.F / P['L_NEG'] / P['AREA']
+        D[:, 1] = (1.0 - P['T0_POS']) / (P['EPS_E'] * c.F) * (I / P['L_POS'] - I / P['L_NEG'])
+        arrhenius = np.exp(-3000.0 * (1.0/T - 1.0/298.15))
+        D[:, 2] = c_s * P['D_SOLV'] * arrhenius * P['V_SEI'] / 2.0 / L_SEI
+        delta_ce_target = (1.0 - P['T0_POS']) / (2.0 * c.F * D_e) * (I * P['L_SEP'])
+        tau_diff = (self.L_total**2) / (20.0 * D_e)
+        D[:, 3] = (delta_ce_target - delta_ce) / tau_diff
+        decay_rate = P['GAMMA_0'] * (P['L_SEI_0'] / L_SEI) * Q_rev
+        D[:, 4] = -i_plating - decay_rate
+        D[:, 5] = decay_rate
+
+        # --- 热网络 ---
+        q_nodes = self._node_heat(I, R_cells, ext.Q)
+        dy[self.IDX_TCELL:] = (q_nodes + self.g_amb * self.p['T_AMB'] - self.K @ T_nodes) / self.heat_cap
+        return dy
+
+    def calculate_state(self, t: float, y: np.ndarray, ext: ExternalState) -> ExternalState:
+        n = self.n_cells
+        X, T_nodes = self._split(y)
+        cell_exts = ext.cells or [ext] * n
+
+        # 先更新每个电芯的代数状态 (SOH / R_tot / ...), 再用新内阻重新分配电流
+        new_cells = []
+        for i, cell in enumerate(self.cells):
+            e = replace(cell_exts[i], cells=None)
+            new_cells.append(cell.calculate_state(t, self._cell_vector(X, i, T_nodes[i]), e))
+        R_cells = np.array([e.R_tot for e in new_cells])
+        U, _ = self._cell_ocv(X[:, 0])
+        I_cells, V = self.share_current(U, R_cells, ext.I * c.N_PARALLEL)
+        for e, I_i in zip(new_cells, I_cells):
+            e.I = I_i
+
+        w = self.q_nominal / self.q_nominal.sum()
+        new_ext = replace(ext, cells=new_cells)
+        new_ext.SOH = float(np.dot(w, [e.SOH for e in new_cells]))
+        new_ext.AGEING = float(np.dot(w, [e.AGEING for e in new_cells]))
+        new_ext.SOC = float(np.dot(w, [e.SOC for e in new_cells]))
+        new_ext.D_e = float(np.mean([e.D_e for e in new_cells]))
+        # 等效单电芯内阻: N_PARALLEL 个 "平均电芯" 并联后与整包内阻相同
+        new_ext.R_tot = c.N_PARALLEL / np.sum(1.0 / R_cells)
+        new_ext.Phi_Anode = min(e.Phi_Anode for e in new_cells) # 最危险的电芯
+        new_ext.I_Plating = float(sum(e.I_Plating for e in new_cells))
+        new_ext.V = V
+
+        # 更新电流 I = P/V (如果在放电), 与单电芯模型一致
+        if abs(new_ext.V) > 0.1 and not (ext.I < 0):
+            new_ext.I = new_ext.P / new_ext.V
+        return new_ext
+
+    def cell_summary(self, y, ext):
+        """各电芯的状态对比 (用于分析不一致性)"""
+        X, T_nodes = self._split(y)
+        cells = ext.cells or [ext] * self.n_cells
+        return [
+            {"cell": i, "T": T_nodes[i], "I": e.I, "SOH": e.SOH, "SOC": e.SOC, "R_tot": e.R_tot}
+            for i, e in enumerate(cells)
+        ]
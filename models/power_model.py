@@ -1,3 +1,4 @@
+import os
 import json
 import numpy as np
 from dataclasses import dataclass
@@ -140,6 +141,21 @@ class DeviceState:
             
         return q
 
+_PLAN_CACHE = {}
+
+def load_plan(filepath: str) -> "SimulationPlan":
+    """
+    带缓存的 SimulationPlan 读取: 同一文件 (按路径 + 修改时间) 只解析一次。
+    DeviceState 只被读取, 因此多个 case 共享同一个 plan 是安全的。
+    """
+    path = os.path.abspath(filepath)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _PLAN_CACHE.get(path)
+    if cached is None or cached[0] != mtime:
+        cached = (mtime, SimulationPlan(path))
+        _PLAN_CACHE[path] = cached
+    return cached[1]
+
 class SimulationPlan:
     def __init__(self, filepath: str):
         with open(filepath, 'r') as f:
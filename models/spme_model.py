@@ -0,0 +1,181 @@
+# models/spme_model.py
+
+import numpy as np
+import config as c
+from models.battery_model import BatterySystem, ExternalState
+
+class SpatialBatterySystem(BatterySystem):
+    """
+    空间分辨的 SPMe 模式 (有限体积):
+      - 负极颗粒沿半径方向 n_r 个球壳控制体 (固相扩散)
+      - 电解液沿厚度方向 负极 / 隔膜 / 正极 各 n_x 个控制体 (液相扩散 + 反应源项)
+    其余标量状态 (T, L_SEI, Q_rev, Q_dead) 与集总模型相同。
+    颗粒表面浓度和负极/隔膜界面处的电解液浓度直接决定析锂判据,
+    适合快充研究; 扫描仍建议用集总模型。
+
+    状态向量布局:
+      y[0:n_r]                 c_s  (负极颗粒, 由内到外)
+      y[n_r:n_r+3n_x]          c_e  (集流体(负) -> 隔膜 -> 集流体(正))
+      y[IDX_T], y[IDX_LSEI], y[IDX_QREV], y[IDX_QDEAD]
+
+    该系统是刚性的, 配合 solver.BDFSolver (隐式, 稀疏 Jacobian) 使用。
+    """
+
+    def __init__(self, param_overrides=None, n_r=50, n_x=50):
+        super().__init__(param_overrides)
+        p = self.p
+        self.n_r = n_r
+        self.n_x = n_x
+
+        # --- 颗粒径向网格 (等间距球壳, 体积/面积省略公共因子 4pi) ---
+        self.R_s = p['R_S_NEG']
+        self.dr = self.R_s / n_r
+        r_faces = np.linspace(0.0, self.R_s, n_r + 1)
+        self.shell_vol = (r_faces[1:]**3 - r_faces[:-1]**3) / 3.0
+        self.face_area = r_faces[1:-1]**2
+
+        # --- 电解液网格 ---
+        self.dx = np.concatenate([
+            np.full(n_x, p['L_NEG'] / n_x),
+            np.full(n_x, p['L_SEP'] / n_x),
+            np.full(n_x, p['L_POS'] / n_x),
+        ])
+        self.dx_face = 0.5 * (self.dx[1:] + self.dx[:-1])
+        # 单位电流对应的源项: 放电时负极向电解液释放锂离子, 正极消耗
+        self.ce_source = np.zeros(3 * n_x)
+        self.ce_source[:n_x] = (1.0 - p['T0_POS']) / (c.EPS_E * c.F * p['AREA'] * p['L_NEG'])
+        self.ce_source[2*n_x:] = -(1.0 - p['T0_POS']) / (c.EPS_E * c.F * p['AREA'] * p['L_POS'])
+
+        # --- 状态索引 ---
+        self.n_ce = 3 * n_x
+        self.IDX_CE = n_r
+        self.IDX_CE_ANODE = n_r + n_x - 1  # 负极/隔膜界面处的电解液控制体
+        self.IDX_T = n_r + self.n_ce
+        self.IDX_LSEI = self.IDX_T + 1
+        self.IDX_QREV = self.IDX_T + 2
+        self.IDX_QDEAD = self.IDX_T + 3
+        self.n_states = self.IDX_T + 4
+        # 恒流下颗粒内浓度分布只有伪稳态 (整体持续下降), 不支持准静态模式
+        self.IDX_FAST = None
+
+        self.ATOL = np.concatenate([
+            np.full(n_r, 1e-3), np.full(self.n_ce, 1e-3),
+            [1e-6, 1e-16, 1e-10, 1e-10],
+        ])
+
+    # ==========================================
+    # 状态转换
+    # ==========================================
+
+    def initial_state(self, y0_lumped):
+        """由集总模型的 7 维初值构造均匀分布的空间初值"""
+        c_s_bar, c_e_bar, T, L_SEI, _, Q_rev, Q_dead = y0_lumped
+        return np.concatenate([
+            np.full(self.n_r, c_s_bar),
+            np.full(self.n_ce, c_e_bar),
+            [T, L_SEI, Q_rev, Q_dead],
+        ])
+
+    def surface_concentration(self, y):
+        """颗粒表面浓度 (由最外两个控制体线性外推)"""
+        c_s = y[:self.n_r]
+        return c_s[-1] + 0.5 * (c_s[-1] - c_s[-2])
+
+    def lumped_view(self, y):
+        """折算成集总模型的 7 维状态 (体积平均浓度 + 负极侧浓差)"""
+        c_s_bar = np.dot(self.shell_vol, y[:self.n_r]) / self.shell_vol.sum()
+        c_e = y[self.IDX_CE:self.IDX_T]
+        c_e_bar = np.dot(self.dx, c_e) / self.dx.sum()
+        delta_ce = c_e_bar - y[self.IDX_CE_ANODE]
+        return np.array([c_s_bar, c_e_bar, y[self.IDX_T], y[self.IDX_LSEI],
+                         delta_ce, y[self.IDX_QREV], y[self.IDX_QDEAD]])
+
+    # ==========================================
+    # 方程
+    # ==========================================
+
+    def derivatives(self, t: float, y: np.ndarray, ext: ExternalState) -> np.ndarray:
+        p = self.p
+        n_r = self.n_r
+        c_s = y[:n_r]
+        c_e = y[self.IDX_CE:self.IDX_T]
+        T, L_SEI, Q_rev, Q_dead = y[self.IDX_T:]
+
+        c_surf = c_s[-1] + 0.5 * (c_s[-1] - c_s[-2])
+        phi_anode, i_plating, i_intercalation = self._anode_reaction(
+            y[self.IDX_CE_ANODE], c_surf, T, L_SEI, Q_rev, ext)
+
+        dy = np.empty(self.n_states)
+
+        # --- 固相扩散: V_i dc_i/dt = G_{i+1/2} - G_{i-1/2}, 表面边界为嵌入通量 ---
+        g = p['D_S_NEG'] * self.face_area * np.diff(c_s) / self.dr
+        dcs = np.zeros(n_r)
+        dcs[:-1] += g
+        dcs[1:] -= g
+        # 表面摩尔通量 (放电为正, 流出颗粒); 与集总模型一致按 SOH 折算有效活性物质
+        j_surf = i_intercalation / (self.Asurf_n * ext.SOH * c.F)
+        dcs[-1] -= j_surf * self.R_s**2
+        dy[:n_r] = dcs / self.shell_vol
+
+        # --- 液相扩散 (Bruggeman 有效扩散系数, 两端零通量) ---
+        d_eff = ext.D_e * c.EPS_E**p['BRUGG']
+        q = d_eff * np.diff(c_e) / self.dx_face
+        dce = np.zeros(self.n_ce)
+        dce[:-1] += q
+        dce[1:] -= q
+        dy[self.IDX_CE:self.IDX_T] = dce / (c.EPS_E * self.dx) + self.ce_source * ext.I
+
+        # --- 温度 (与集总模型相同) ---
+        heat_gen = (ext.I**2 * ext.R_tot * c.N_PARALLEL) + ext.Q
+        heat_diss = c.H_CONV * c.A_SURF * (T - p['T_AMB'])
+        dy[self.IDX_T] = (heat_gen - heat_diss) / (c.MASS_PHONE * c.CP_PHONE)
+
+        # --- SEI (由表面浓度驱动) ---
+        arrhenius = np.exp(-3000.0 * (1.0/T - 1.0/298.15))
+        dy[self.IDX_LSEI] = c_surf * p['D_SOLV'] * arrhenius * p['V_SEI'] / 2.0 / L_SEI
+
+        # --- 可逆析锂 / 死锂 ---
+        gamma = p['GAMMA_0'] * (p['L_SEI_0'] / L_SEI)
+        decay_rate = gamma * Q_rev
+        dy[self.IDX_QREV] = -i_plating - decay_rate
+        dy[self.IDX_QDEAD] = decay_rate
+
+        return dy
+
+    def jac_sparsity(self):
+        """
+        Jacobian 的稀疏结构: 两个三对角扩散块 + 表面/界面处与标量状态的耦合。
+        供 BDFSolver 做分组有限差分, 每次 Jacobian 只需少量导数调用。
+        """
+        from scipy.sparse import lil_matrix
+
+        n = self.n_states
+        n_r = self.n_r
+        S = lil_matrix((n, n), dtype=bool)
+        for i in range(n_r):
+            S[i, max(0, i-1):min(n_r, i+2)] = True
+        for i in range(self.IDX_CE, self.IDX_T):
+            S[i, max(self.IDX_CE, i-1):min(self.IDX_T, i+2)] = True
+
+        # 依赖表面浓度 / 界面电解液浓度 / 温度 / SEI / 可逆锂的行 (析锂判据)
+        reaction_cols = [n_r - 2, n_r - 1, self.IDX_CE_ANODE, self.IDX_T, self.IDX_LSEI, self.IDX_QREV]
+        for row in (n_r - 1, self.IDX_QREV):
+            for col in reaction_cols:
+                S[row, col] = True
+        S[self.IDX_T, self.IDX_T] = True
+        for col in (n_r - 2, n_r - 1, self.IDX_T, self.IDX_LSEI):
+            S[self.IDX_LSEI, col] = True
+        for col in (self.IDX_LSEI, self.IDX_QREV):
+            S[self.IDX_QDEAD, col] = True
+        return S.tocsc()
+
+    def calculate_state(self, t: float, y: np.ndarray, ext: ExternalState) -> ExternalState:
+        new_ext = super().calculate_state(t, self.lumped_view(y), ext)
+
+        # 负极电位 / 析锂电流用表面浓度和界面电解液浓度重新计算
+        phi_anode, i_plating, _ = self._anode_reaction(
+            y[self.IDX_CE_ANODE], self.surface_concentration(y),
+            y[self.IDX_T], y[self.IDX_LSEI], y[self.IDX_QREV], ext)
+        new_ext.Phi_Anode = phi_anode
+        new_ext.I_Plating = i_plating
+        return new_ext
@@ -0,0 +1,249 @@
+import asyncio
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+from simulation import dedup
+from simulation.scanner import Scanner, run_case, finish_matrix_record, lifetime_summaries
+
+
+class ScanHandle:
+    """
+    一次已提交扫描的句柄。
+
+        handle = await api.submit("matrix", soh_levels=[0.9], ambient_c=[25, 45])
+        async for record in handle:     # 按完成顺序逐条返回
+            ...
+        records = await handle.result() # 或者等待全部完成 (按 case 顺序, 含汇总记录)
+        handle.cancel()                 # 取消尚未完成的 case
+
+    取消时执行器中还在排队的计算一并撤销; 与其他扫描共享的计算 (去重) 只在最后一个使用者取消后撤销。
+    进程池中已经开始的 case 无法中断, 会跑完但结果被丢弃。
+    """
+
+    def __init__(self, command, cases, futures, finalize=None):
+        self.command = command
+        self.cases = cases
+        self._futures = futures
+        self._finalize = finalize
+        self._cancelled = False
+
+    @property
+    def total(self):
+        return len(self._futures)
+
+    @property
+    def completed(self):
+        return sum(f.done() and not f.cancelled() for f in self._futures)
+
+    def done(self):
+        return all(f.done() for f in self._futures)
+
+    def cancelled(self):
+        return self._cancelled
+
+    def cancel(self):
+        """取消所有未完成的 case, 返回被取消的数量"""
+        self._cancelled = True
+        return sum(f.cancel() for f in self._futures if not f.done())
+
+    async def __aiter__(self):
+        for next_done in asyncio.as_completed(self._futures):
+            try:
+                record = await next_done
+            except asyncio.CancelledError:
+                return
+            if record is not None:
+                yield record
+
+    async def result(self):
+        """等待全部 case, 返回结果记录 (按 case 顺序; 失败的 case 被跳过)"""
+        records = [r for r in await asyncio.gather(*self._futures) if r is not None]
+        if self._finalize is not None:
+            records = records + self._finalize(records)
+        return records
+
+
+class AsyncScanner:
+    """
+    asyncio 友好的扫描接口, 便于嵌入服务进程。
+
+    计算全部放到执行器中 (默认: workers > 1 时进程池, 否则单线程池),
+    事件循环不会被阻塞; 不打印, 不写文件, 结果直接返回给调用方。
+    同一个 AsyncScanner 可以同时处理多个扫描请求, 它们共享同一个执行器和已完成结果的缓存
+    (按有效输入哈希去重, 见 simulation.dedup)。
+
+        async with AsyncScanner(workers=4) as api:
+            handle = await api.submit("external", soh_levels=[0.9], apps=["gaming_5g"])
+            records = await handle.result()
+    """
+
+    def __init__(self, workers=1, executor=None, solver_options=None, model_options=None, backend=None,
+                 cache_size=10000):
+        """
+        executor:       自定义执行器 (由调用方负责关闭)
+        solver_options / model_options: 默认设置, submit 时可逐次覆盖
+        backend:        可选的批量执行后端 (例如 DistributedBackend), 整批在线程中运行
+        cache_size:     已完成结果缓存的条数上限 (超出时丢弃最久未使用的)
+        """
+        self.workers = max(1, int(workers))
+        self.solver_options = solver_options
+        self.model_options = model_options
+        self.backend = backend
+        self._executor = executor
+        self._owns_executor = executor is None
+        self._scanner = None
+        self.cache_size = cache_size
+        self._records = OrderedDict()
+        self._inflight = {}  # 输入哈希 -> [执行器 future, 引用数], 各次提交共享
+
+    # --- 生命周期 ---
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = (ProcessPoolExecutor(max_workers=self.workers) if self.workers > 1
+                              else ThreadPoolExecutor(max_workers=1))
+        return self._executor
+
+    def close(self):
+        if self._owns_executor and self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    # --- 提交 ---
+    async def submit(self, command, solver_options=None, model_options=None, **scan):
+        """
+        提交一次扫描 (command: external / internal / matrix / lifetime / design), 立即返回 ScanHandle。
+        scan 与 Scanner.run_*_scan 的参数相同 (output 会被忽略);
+        design 需要 design=<simulation.design 中的设计>, 其余参数同 ScanDesign.cases()。
+        """
+        loop = asyncio.get_running_loop()
+        scan.pop("output", None)
+
+        if self._scanner is None:
+            # Scanner 构造时读取 Cost.json 的 App 列表, 放到线程里避免阻塞事件循环
+            self._scanner = await loop.run_in_executor(None, Scanner)
+        builder = {
+            "external": self._scanner.external_cases,
+            "internal": self._scanner.internal_cases,
+            "matrix": self._scanner.matrix_cases,
+            "lifetime": self._scanner.lifetime_cases,
+            # 通用设计: submit("design", design=FullFactorial(...), soh=..., duration=...)
+            "design": lambda design, **fixed: list(design.cases(**fixed)),
+        }
+        if command not in builder:
+            raise ValueError(f"Unknown scan '{command}', choose from {sorted(builder)}")
+        cases = builder[command](**scan)
+
+        run_kwargs = {
+            "solver_options": solver_options if solver_options is not None else self.solver_options,
+            "model_options": model_options if model_options is not None else self.model_options,
+        }
+        run_kwargs["backend"] = (getattr(self.backend, "name", type(self.backend).__name__) if self.backend is not None
+                                 else f"async({type(self._get_executor()).__name__})")
+        post = finish_matrix_record if command == "matrix" else None
+
+        finalize = None
+        if command == "lifetime":
+            apps = list(dict.fromkeys(case["app_name"] for case in cases))
+            soh_start = scan.get("soh_start", 0.96)
+            soh_eol = scan.get("soh_eol", 0.80)
+            finalize = lambda records: lifetime_summaries(records, apps, soh_start, soh_eol)
+
+        if self.backend is not None:
+            futures = self._submit_backend(loop, cases, run_kwargs, post)
+        else:
+            futures = self._submit_unique(loop, cases, run_kwargs, post)
+        return ScanHandle(command, cases, futures, finalize)
+
+    def _submit_unique(self, loop, cases, run_kwargs, post):
+        """
+        按有效输入哈希 (simulation.dedup) 合并: 重复 case (包括其他提交中正在计算的) 共享一次计算,
+        以前已完成的结果直接复用。
+        """
+        executor = self._get_executor()
+        futures = []
+        for case in cases:
+            key = dedup.input_hash(case, run_kwargs)
+            if key in self._records:
+                self._records.move_to_end(key)
+                job = loop.create_future()
+                job.set_result(self._records[key])
+                futures.append(asyncio.ensure_future(self._relabel(job, case, key, post)))
+                continue
+            entry = self._inflight.get(key)
+            if entry is None or entry[0].cancelled():
+                job = loop.run_in_executor(executor, _run_one, case, run_kwargs)
+                job.add_done_callback(lambda f, key=key: self._remember(key, f))
+                entry = self._inflight[key] = [job, 0]
+            entry[1] += 1
+            task = asyncio.ensure_future(self._relabel(entry[0], case, key, post))
+            task.add_done_callback(lambda t, entry=entry, key=key: self._release(key, entry))
+            futures.append(task)
+        return futures
+
+    def _release(self, key, entry):
+        """一个 case 结束 (完成或取消) 时减少共享计算的引用; 无人等待且尚未完成时撤销计算"""
+        entry[1] -= 1
+        if entry[1] == 0 and not entry[0].done():
+            entry[0].cancel()
+            if self._inflight.get(key) is entry:
+                del self._inflight[key]
+
+    def _remember(self, key, future):
+        entry = self._inflight.get(key)
+        if entry is not None and entry[0] is future:
+            del self._inflight[key]
+        if not future.cancelled() and future.exception() is None and future.result() is not None:
+            self._records[key] = future.result()
+            self._records.move_to_end(key)
+            while len(self._records) > self.cache_size:
+                self._records.popitem(last=False)
+
+    @staticmethod
+    async def _relabel(future, case, key, post):
+        # shield: 取消一个 case 不直接撤销共享的计算, 由 _release 按引用数决定
+        record = await asyncio.shield(future)
+        if record is None:
+            return None
+        record = dedup.relabel(record, case, key)
+        return post(record) if post is not None else record
+
+    def _submit_backend(self, loop, cases, run_kwargs, post):
+        """
+        后端一次执行整批 case: 在线程中运行, 每个 case 的 future 在整批结束后一起完成。
+        整批交给后端后无法撤销, 取消只丢弃结果。
+        """
+        batch = loop.run_in_executor(None, lambda: self.backend.run(cases, **run_kwargs))
+        futures = [loop.create_future() for _ in cases]
+
+        def distribute(done):
+            for fut, out in zip(futures, _batch_outputs(done, len(cases))):
+                if fut.done():
+                    continue
+                if isinstance(out, BaseException):
+                    fut.set_exception(out)
+                else:
+                    record = out[0]
+                    fut.set_result(post(record) if (post and record is not None) else record)
+
+        batch.add_done_callback(distribute)
+        return futures
+
+
+def _batch_outputs(done, n):
+    if done.cancelled():
+        return [asyncio.CancelledError()] * n
+    if done.exception() is not None:
+        return [done.exception()] * n
+    return done.result()
+
+
+def _run_one(case, run_kwargs):
+    """执行器中运行的单个 case (模块级函数, 可被进程池 pickle)"""
+    record, _ = run_case(**case, **run_kwargs)
+    return record
@@ -0,0 +1,127 @@
+import numpy as np
+import config as c
+from collections import defaultdict
+
+from models import make_system
+from models.power_model import load_plan
+from simulation import dedup
+from simulation.identity import canonical
+from simulation.init_utils import get_initial_state_by_soh
+from simulation.quasi_static import aging_rate, relaxation_time, consistent_ext
+from simulation.scanner import run_case
+
+
+def chains(cases, run_kwargs, max_length=16):
+    """
+    把 case 分成续算链 (返回下标列表的列表)。
+    App (解析后的功耗 / 产热) 与时长相同的 case 归为一条链, 链内依次按环境温度, 其他参数覆盖,
+    SOH (从高到低) 排序, 使相邻 case 只在一个轴上相差一步。
+    链按顺序切成至多 max_length 个 case 的段 (每段链首冷启动, 各段可并行);
+    切分只取决于 case 集合本身, 与并行进程数无关, 结果不随 --workers 变化。
+    """
+    groups = defaultdict(list)
+    order = {}
+    for i, case in enumerate(cases):
+        inputs = dedup.effective_inputs(case, run_kwargs)
+        groups[canonical([inputs["device"], inputs["duration"]])].append(i)
+        params = inputs["params"]
+        others = sorted((k, v) for k, v in params.items() if k != "T_AMB")
+        order[i] = (inputs["y0"][2], canonical(others), -case["soh"])
+
+    out = []
+    for idx in groups.values():
+        idx = sorted(idx, key=order.__getitem__)
+        out += [idx[k:k + max_length] for k in range(0, len(idx), max_length)]
+    return out
+
+
+def warm_correction(case, seed, model_options=None):
+    """
+    以 seed 作为快变量初值时, 结果相对冷启动 (从环境温度升温) 的修正量。
+
+    冷启动时快变量从冷态 y_c 出发, 以时间常数 tau (quasi_static.relaxation_time) 弛豫;
+    续算从 y_w (快变量 = seed) 出发, 少了这段升温。取 s = exp(-t/tau) 为剩余偏离比例,
+    沿 y_w -> y_c 的衰减速率按二次插值 r(s) = r_w + (r_c - r_w) s + 4 dm s (1 - s)
+    (dm 为中点速率偏离线性插值的量), 在 [0, duration] 上积分得到两者的差:
+        速率: ((r_w - r_c) F - 4 dm G) / duration,  F = ∫ s dt,  G = ∫ s (1 - s) dt
+        温度: (T_w - T_c) F / duration              (温度本身是状态量, 线性)
+    更高阶项未计入, 用二次项的大小 |4 dm G| / duration 作为修正误差的估计
+    (各 App / 时长 / 环境温度下实测残差均小于该项)。
+    外推假设冷启动与续算都跑满 duration (不触发低压保护)。
+
+    返回 {"rate": 1/小时, "temp": K, "error": 1/小时, "rate_warm": 1/小时};
+    模型不支持 (没有 IDX_FAST) 或 App 不存在时返回 None。
+    """
+    system = make_system(case.get("param_overrides"), **(model_options or {}))
+    if getattr(system, "IDX_FAST", None) is None:
+        return None
+    try:
+        plan = load_plan("Cost.json")
+    except FileNotFoundError:
+        return None
+    if case["app_name"] not in plan.profiles:
+        return None
+    device_state = plan.profiles[case["app_name"]]
+
+    y0, ext = get_initial_state_by_soh(target_soh=case["soh"], soc_start=1.0)
+    t_amb = (case.get("param_overrides") or {}).get("T_AMB")
+    if t_amb is not None:
+        y0[2] = t_amb
+    y_cold = np.array(system.initial_state(y0) if hasattr(system, "initial_state") else y0, dtype=float)
+    y_warm = y_cold.copy()
+    y_warm[system.IDX_FAST] = seed
+
+    ext.P = device_state.calculate_power_mw() / 1000.0 / c.N_PARALLEL
+    ext.Q = device_state.calculate_heat_mw() / 1000.0
+    if ext.V > 0.1:
+        ext.I = ext.P / ext.V
+
+    def rate(y):
+        e = consistent_ext(system, y, ext)
+        return aging_rate(system, y, e, system.derivatives(0.0, y, e))
+
+    try:
+        tau = relaxation_time(system, y_warm, consistent_ext(system, y_warm, ext))
+    except np.linalg.LinAlgError:
+        return None
+    r_c, r_w, r_m = rate(y_cold), rate(y_warm), rate(0.5 * (y_cold + y_warm))
+    dm = r_m - 0.5 * (r_c + r_w)
+    duration = case["duration"]
+    F = tau * (1.0 - np.exp(-duration / tau))
+    G = F - 0.5 * tau * (1.0 - np.exp(-2.0 * duration / tau))
+    return {
+        "rate": ((r_w - r_c) * F - 4.0 * dm * G) / duration,
+        "temp": (system.temperature(y_warm) - system.temperature(y_cold)) * F / duration,
+        "error": abs(4.0 * dm * G) / duration,
+        "rate_warm": r_w,
+    }
+
+
+def run_chain(cases, run_kwargs):
+    """
+    依次运行一条续算链 (模块级函数, 可在子进程中运行), 返回 [(record, profiler), ...]。
+    链首冷启动 (由 SOH 反推初值, 温度取环境温度); 之后每个 case 用前一个 case 结束时的
+    快变量 (温度, 动态浓差) 作为初值, 升温过程每条链只计算一次。
+    续算 case 的结果按 warm_correction 补回升温段, 与冷启动结果可比。
+
+    精度保护: warm_correction 估计的修正误差超过 solver_options["warm_rtol"] (默认 0.01)
+    乘以该 case 的衰减速率时, 该 case 改为冷启动, 并从它重新开始续算。
+
+    注意: 续算 case 仍然积分整个 duration; 只有配合提前停止 (stop_rtol, 见 simulation.convergence)
+    跳过升温段才会缩短积分时间。
+    """
+    solver_options = run_kwargs.get("solver_options") or {}
+    rtol = solver_options.get("warm_rtol", 0.01)
+    outputs = []
+    seed = None
+    for case in cases:
+        warm, correction = seed, None
+        if warm is not None:
+            correction = warm_correction(case, warm, run_kwargs.get("model_options"))
+            if correction is None or correction["error"] > rtol * abs(correction["rate_warm"]):
+                warm, correction = None, None
+        report = {}
+        outputs.append(run_case(**case, **run_kwargs, warm_start=warm, warm_correction=correction,
+                                report=report))
+        seed = report.get("fast_state")
+    return outputs
@@ -0,0 +1,69 @@
+import numpy as np
+
+
+class ConvergenceMonitor:
+    """
+    收敛提前终止 (solver_options["stop_rtol"] 开启)。
+
+    每隔 window 秒取一次 (时间, SOH, 温度) 快照, 用最近三个快照得到前后两个窗口的平均衰减速率 r1, r2,
+    再往前一个窗口为 r0。静态负载下 SOC 匀速下降, 衰减速率趋于线性变化, 因此判据是:
+      - 速率趋势稳定: |r2 - (2 r1 - r0)| <= rtol * |r2|  (线性外推预测最后一个窗口的误差)
+      - 温度稳定:     |T2 - T1| <= temp_tol (K, 最后一个窗口内的温度变化)
+    满足后停止积分, 剩余时长按最后的速率和斜率线性外推, 温度按当前值外推。
+    达到的相对偏差记为 rel_dev, 最后一个窗口的温度变化记为 temp_drift (K); 未收敛时为最后一次检查的值,
+    由二者可以看出是哪个判据没有满足 (rel_dev 已小于 rtol 时是温度未稳定)。
+
+    注意: 外推假设剩余时长内不会触发低压保护; 低压停止的工况应关闭该模式或缩短 duration。
+    """
+
+    def __init__(self, duration, rtol=0.01, window=600.0, temp_tol=0.01):
+        self.duration = duration
+        self.rtol = rtol
+        self.window = window
+        self.temp_tol = temp_tol
+        self.snapshots = []
+        self.converged = False
+        self.rel_dev = np.nan
+        self.temp_drift = np.nan
+        self.t_stop = None
+        self._next = window
+
+    def start(self, t, soh, T):
+        self.snapshots = [(t, soh, T)]
+        self._next = t + self.window
+
+    def update(self, t, soh, T):
+        """每步调用; 返回 True 表示已收敛, 可以停止积分"""
+        if t < self._next or t >= self.duration:
+            return False
+        self.snapshots.append((t, soh, T))
+        self._next = t + self.window
+        self.temp_drift = abs(self.snapshots[-1][2] - self.snapshots[-2][2])
+        if len(self.snapshots) < 4:
+            return False
+
+        r0, r1, r2 = self._rates()[-3:]
+        scale = max(abs(r2), 1e-300)
+        self.rel_dev = abs(r2 - (2.0 * r1 - r0)) / scale
+        if self.rel_dev <= self.rtol and self.temp_drift <= self.temp_tol:
+            self.converged = True
+            self.t_stop = t
+        return self.converged
+
+    def _rates(self):
+        """各窗口的平均衰减速率 (1/秒)"""
+        return [(s0 - s1) / (t1 - t0) for (t0, s0, _), (t1, s1, _) in zip(self.snapshots, self.snapshots[1:])]
+
+    def extrapolate(self):
+        """
+        从停止时刻到 duration 的外推: 返回 (SOH 损失, 剩余时长 s, 温度 K)。
+        速率取最后窗口的平均值 (对应窗口中点) 并按最近两个窗口的斜率线性变化。
+        """
+        (ta, _, _), (tb, _, _), (tc, _, T) = self.snapshots[-3:]
+        r1, r2 = self._rates()[-2:]
+        slope = (r2 - r1) / (0.5 * (tc - ta))
+        remaining = self.duration - tc
+        mid = 0.5 * (tb + tc)
+        # r(t) = r2 + slope * (t - mid), 在 [tc, duration] 上积分
+        loss = r2 * remaining + slope * (0.5 * (self.duration - mid) ** 2 - 0.5 * (tc - mid) ** 2)
+        return max(loss, 0.0), remaining, T
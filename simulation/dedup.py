@@ -0,0 +1,173 @@
+import ast
+import sys
+import inspect
+import hashlib
+from collections import defaultdict
+
+from models import make_system
+from models.battery_model import base_params
+from models.power_model import load_plan
+from simulation.identity import canonical
+from simulation.init_utils import get_initial_state_by_soh
+
+# 用来判断 "参数无影响" 的输出字段
+_OUTPUTS = ("Aging_Rate_Hr", "Avg_Temp_C")
+
+_READ_KEYS = {}
+
+
+def _model_classes(obj, found, depth=0):
+    """模型对象及其组合的子模型 (例如 PackSystem.cells 中的 BatterySystem) 的全部类"""
+    for cls in type(obj).__mro__:
+        if cls is not object:
+            found.add(cls)
+    if depth > 2:
+        return found
+    for value in vars(obj).values():
+        items = value if isinstance(value, (list, tuple)) else [value]
+        for item in items:
+            # 带参数表和导数的对象视为子模型
+            if hasattr(item, "p") and hasattr(item, "derivatives") and type(item) not in found:
+                _model_classes(item, found, depth + 1)
+    return found
+
+
+def model_param_keys(model_options=None):
+    """
+    模型通过 self.p 可能读取的参数名 (静态分析实际构造出的模型对象, 以及它组合的子模型
+    (例如 pack 模型逐电芯的 BatterySystem) 的类及其基类所在模块的源码, 收集其中出现的、
+    属于参数表的字符串常量)。按分支读取的参数 (例如只在析锂时用到的 K_PLATING)
+    也会被包含, 因此是 "可能读取" 的超集; 直接读取 config 模块的常量 (c.H_CONV 等) 不在其中,
+    对它们的覆盖不会生效。
+    无法取得某个模块的源码时返回 None, 此时调用方把所有覆盖都计入哈希。
+    """
+    options = dict(model_options or {})
+    name = canonical(options)
+    if name not in _READ_KEYS:
+        params = base_params()
+        keys = set()
+        try:
+            for cls in _model_classes(make_system(None, **options), set()):
+                module = sys.modules.get(cls.__module__)
+                if module is None:
+                    raise OSError(f"module of {cls.__name__} not loaded")
+                for node in ast.walk(ast.parse(inspect.getsource(module))):
+                    if isinstance(node, ast.Constant) and isinstance(node.value, str) and node.value in params:
+                        keys.add(node.value)
+            _READ_KEYS[name] = frozenset(keys)
+        except (OSError, TypeError):
+            _READ_KEYS[name] = None
+    return _READ_KEYS[name]
+
+
+def _device_signature(app_name):
+    """App 解析后的功耗 / 产热 (mW); 配置不同但结果相同的 App 得到相同签名"""
+    try:
+        plan = load_plan("Cost.json")
+    except FileNotFoundError:
+        return {"app": app_name}
+    if app_name not in plan.profiles:
+        return {"app": app_name}
+    device = plan.profiles[app_name]
+    return {"P_mw": device.calculate_power_mw(), "Q_mw": device.calculate_heat_mw()}
+
+
+def effective_inputs(case, run_kwargs, inert=None):
+    """
+    一个 case 真正影响结果的输入:
+      - App 解析后的功耗 / 产热
+      - 初值 y0 和初始外部状态 (由 SOH 反推, 含环境温度同步)
+      - 模型会读取且与基准值不同的参数覆盖
+      - 时长, 求解器和模型设置
+    标签字段 (scan_type, extra_data) 不计入。
+    inert: 之前的扫描中观察到无影响的参数 {参数名: {其余输入的规范串, ...}} (见 inert_parameters);
+           其余输入与其中之一相同时, 该参数也不计入
+    """
+    overrides = case.get("param_overrides") or {}
+    model_options = run_kwargs.get("model_options")
+    read = model_param_keys(model_options)
+    base = base_params()
+    params = {k: v for k, v in overrides.items() if (read is None or k in read) and v != base.get(k)}
+
+    y0, ext = get_initial_state_by_soh(target_soh=case["soh"], soc_start=1.0)
+    if overrides.get("T_AMB") is not None:
+        y0[2] = overrides["T_AMB"]
+
+    inputs = {
+        "device": _device_signature(case["app_name"]),
+        "y0": [float(v) for v in y0],
+        "ext": {k: v for k, v in ext.__dict__.items() if v is not None},
+        "params": params,
+        "duration": case["duration"],
+        "solver": run_kwargs.get("solver_options") or {},
+        "model": model_options or {},
+    }
+    for name in sorted(set(params) & set(inert or {})):
+        if _context(inputs, name) in inert[name]:
+            del params[name]
+    return inputs
+
+
+def _context(inputs, name):
+    """去掉参数 name 后其余输入的规范串"""
+    params = {k: v for k, v in inputs["params"].items() if k != name}
+    return canonical(dict(inputs, params=params))
+
+
+def input_hash(case, run_kwargs, inert=None):
+    return hashlib.sha256(canonical(effective_inputs(case, run_kwargs, inert)).encode()).hexdigest()
+
+
+def relabel(record, case, key):
+    """把已有结果复制给另一个输入等价的 case"""
+    out = dict(record)
+    out.update(Type=case["scan_type"], App=case["app_name"], SOH_Start=case["soh"])
+    out.update(case.get("extra_data") or {})
+    out["Input_Hash"] = key[:16]
+    if "Param_Hash" in out:
+        # 描述输入的出处字段换成本 case 的; 代码版本, 执行方式等保留实际计算时的值
+        from simulation import provenance
+        out.update(provenance.case_fields(case))
+    return out
+
+
+def unread_overrides(cases, model_options=None):
+    """参数覆盖中模型根本不会读取的参数名"""
+    read = model_param_keys(model_options)
+    if read is None:
+        return []
+    names = {k for case in cases for k in (case.get("param_overrides") or {})}
+    return sorted(k for k in names if k not in read)
+
+
+def duplicate_profiles(cases):
+    """解析后功耗 / 产热完全相同的 App 分组"""
+    groups = defaultdict(list)
+    for app in dict.fromkeys(case["app_name"] for case in cases):
+        groups[canonical(_device_signature(app))].append(app)
+    return [apps for apps in groups.values() if len(apps) > 1]
+
+
+def inert_parameters(cases, records, run_kwargs, inert=None):
+    """
+    结果中观察到无影响的参数: 对每个被覆盖的参数 X, 把其余输入相同的 case 分组,
+    若每组内 X 取不同值时输出 (速率, 温度) 都完全相同, 则认为 X 在本次扫描中无影响。
+    records 与 cases 一一对应 (失败的 case 为 None); inert 同 effective_inputs。
+    返回 {X: {观察到无影响的其余输入的规范串, ...}}, 可合并后传给 effective_inputs / input_hash,
+    使之后的扫描在相同的其余输入下不再为 X 的不同取值重复仿真。
+    """
+    names = {k for case in cases for k in (case.get("param_overrides") or {})}
+    base = base_params()
+    found = {}
+    for name in sorted(names):
+        groups = defaultdict(list)
+        for case, record in zip(cases, records):
+            if record is None:
+                continue
+            inputs = effective_inputs(case, run_kwargs, inert)
+            value = (case.get("param_overrides") or {}).get(name, base.get(name))
+            groups[_context(inputs, name)].append((value, canonical([record[k] for k in _OUTPUTS])))
+        varied = {ctx: g for ctx, g in groups.items() if len({v for v, _ in g}) > 1}
+        if varied and all(len({out for _, out in g}) == 1 for g in varied.values()):
+            found[name] = set(varied)
+    return found
@@ -0,0 +1,253 @@
+import itertools
+from abc import ABC, abstractmethod
+import numpy as np
+
+from models.battery_model import base_params
+
+# 内置轴: 名称 -> 结果记录中的列名
+_BUILTIN = {
+    "soh": "SOH_Start",
+    "ambient": "Ambient_Temp",
+    "profile": "App",
+    "duration": "Duration",
+}
+_ALIASES = {"app": "profile", "t_amb_c": "ambient"}
+
+
+class Axis:
+    """
+    扫描轴。name 可以是内置轴 soh / ambient (摄氏度) / profile / duration,
+    也可以是任意参数名 (例如 "K0"), 此时作为参数覆盖传入模型;
+    relative=True 时取值是相对 config 基准值的倍率。
+    离散轴给 values, 连续轴 (Latin hypercube) 给 bounds=(low, high)。
+    """
+
+    def __init__(self, name, values=None, bounds=None, relative=False):
+        key = _ALIASES.get(name.lower(), name.lower())
+        if key in _BUILTIN:
+            self.kind = key
+            self.label = _BUILTIN[key]
+        elif name in base_params():
+            self.kind = "param"
+            self.label = name
+        else:
+            raise ValueError(f"Unknown axis '{name}': use soh / ambient / profile / duration "
+                             f"or a parameter name from config.py")
+        if values is None and bounds is None:
+            raise ValueError(f"Axis '{name}' needs values or bounds")
+        self.name = name
+        self.values = list(values) if values is not None else None
+        self.bounds = tuple(bounds) if bounds is not None else None
+        self.relative = relative
+
+    def __len__(self):
+        return len(self.values)
+
+    def __repr__(self):
+        return f"Axis({self.name!r}, {self.values if self.values is not None else self.bounds})"
+
+    def apply(self, case, value):
+        """把轴上的一个取值写进 case 字典"""
+        if self.kind == "soh":
+            case["soh"] = value
+        elif self.kind == "profile":
+            case["app_name"] = value
+        elif self.kind == "duration":
+            case["duration"] = value
+            case["extra_data"][self.label] = value
+        elif self.kind == "ambient":
+            case["param_overrides"]["T_AMB"] = value + 273.15
+            case["extra_data"][self.label] = value
+        else:
+            base = base_params()[self.name]
+            case["param_overrides"][self.name] = base * value if self.relative else value
+            case["extra_data"][self.label] = value
+
+
+class ScanDesign(ABC):
+    """
+    扫描设计: 若干命名轴 + 取点方式。points() 是惰性生成器, 即使 10^6 个点也不会一次性展开;
+    cases() 把每个点转成 run_case 的参数字典, 结果记录中每个轴对应一列 (见 Axis.label)。
+    """
+    grid = False
+    continuous = False
+
+    def __init__(self, *axes):
+        self.axes = list(axes)
+        if not self.continuous:
+            ranged = [a.name for a in self.axes if a.values is None]
+            if ranged:
+                raise ValueError(f"{type(self).__name__} needs discrete values for axes {ranged} "
+                                 f"(bounds are only used by LatinHypercube)")
+
+    @property
+    def dims(self):
+        """结果记录中标记各轴的列名"""
+        return tuple(a.label for a in self.axes)
+
+    @abstractmethod
+    def __len__(self):
+        """点数 (不展开 points)"""
+
+    @abstractmethod
+    def points(self):
+        """逐个生成 {轴名: 取值}"""
+
+    def cases(self, scan_type="Design", soh=0.9, profile="gaming_5g", duration=3600, param_overrides=None):
+        """
+        惰性生成 case。未被轴覆盖的维度取这里给的固定值。
+        """
+        by_name = {a.name: a for a in self.axes}
+        for point in self.points():
+            case = dict(soh=soh, app_name=profile, duration=duration, scan_type=scan_type,
+                        param_overrides=dict(param_overrides or {}), extra_data={})
+            for name, value in point.items():
+                by_name[name].apply(case, value)
+            # 与手写 case 保持一致: 没有内容时用 None / 省略
+            if not case["param_overrides"]:
+                case["param_overrides"] = None
+            if not case["extra_data"]:
+                del case["extra_data"]
+            yield case
+
+    def coords(self):
+        """网格设计的各维坐标 {列名: 取值列表}"""
+        if not self.grid:
+            raise ValueError(f"{type(self).__name__} is not a grid design")
+        return {a.label: list(a.values) for a in self.axes}
+
+
+class FullFactorial(ScanDesign):
+    """全因子: 所有轴取值的笛卡尔积 (第一个轴变化最慢)"""
+    grid = True
+
+    def __len__(self):
+        return int(np.prod([len(a) for a in self.axes]))
+
+    def points(self):
+        names = [a.name for a in self.axes]
+        for values in itertools.product(*(a.values for a in self.axes)):
+            yield dict(zip(names, values))
+
+
+class Zip(ScanDesign):
+    """各轴按位置一一配对 (所有轴长度必须相同)"""
+
+    def __init__(self, *axes):
+        super().__init__(*axes)
+        lengths = {len(a) for a in self.axes}
+        if len(lengths) > 1:
+            raise ValueError(f"Zip design needs axes of equal length, got {sorted(lengths)}")
+
+    def __len__(self):
+        return len(self.axes[0]) if self.axes else 0
+
+    def points(self):
+        names = [a.name for a in self.axes]
+        for values in zip(*(a.values for a in self.axes)):
+            yield dict(zip(names, values))
+
+
+class OneAtATime(ScanDesign):
+    """单因素 (敏感度) 设计: 每次只改变一个轴, 其余维度保持固定值"""
+
+    def __len__(self):
+        return sum(len(a) for a in self.axes)
+
+    def points(self):
+        for axis in self.axes:
+            for value in axis.values:
+                yield {axis.name: value}
+
+
+class LatinHypercube(ScanDesign):
+    """
+    拉丁超立方采样: 每个连续轴 (bounds) 均分为 samples 个区间, 每个区间恰好取一个点。
+    离散轴 (values) 按同样的分层方式均匀取值。每个轴只保存一个长度为 samples 的置换。
+    """
+
+    continuous = True
+
+    def __init__(self, *axes, samples=100, seed=None):
+        super().__init__(*axes)
+        self.samples = int(samples)
+        self.seed = seed
+
+    def __len__(self):
+        return self.samples
+
+    def points(self):
+        rng = np.random.default_rng(self.seed)
+        n = self.samples
+        perms = [rng.permutation(n) for _ in self.axes]
+        for i in range(n):
+            point = {}
+            for axis, perm in zip(self.axes, perms):
+                u = (perm[i] + rng.random()) / n
+                if axis.bounds is not None:
+                    low, high = axis.bounds
+                    point[axis.name] = float(low + u * (high - low))
+                else:
+                    point[axis.name] = axis.values[min(int(u * len(axis.values)), len(axis.values) - 1)]
+            yield point
+
+
+class Custom(ScanDesign):
+    """
+    自定义设计: points 是 {轴名: 取值} 的可迭代对象 (可以是生成器函数),
+    axes 只用来声明轴的含义, 其 values 可省略 (传 values=[] 即可)。
+    """
+
+    continuous = True
+
+    def __init__(self, points, *axes, length=None):
+        super().__init__(*axes)
+        self._points = points
+        self._length = length
+
+    def __len__(self):
+        if self._length is not None:
+            return self._length
+        return len(self._points)
+
+    def points(self):
+        source = self._points() if callable(self._points) else self._points
+        for point in source:
+            yield dict(point)
+
+
+DESIGNS = {
+    "factorial": FullFactorial,
+    "zip": Zip,
+    "oat": OneAtATime,
+    "lhs": LatinHypercube,
+}
+
+
+def make_design(kind, axes, samples=None, seed=None):
+    """
+    由 spec / 命令行配置构造设计。axes: {轴名: 取值列表 或 {"low": a, "high": b, "relative": bool}}
+    (也接受 {"values": [...]} 形式)。
+    """
+    if kind not in DESIGNS:
+        raise ValueError(f"Unknown design '{kind}', choose from {sorted(DESIGNS)}")
+    built = []
+    for name, spec in axes.items():
+        if isinstance(spec, dict):
+            bounds = (spec["low"], spec["high"]) if "low" in spec else None
+            built.append(Axis(name, spec.get("values"), bounds=bounds, relative=spec.get("relative", False)))
+        else:
+            built.append(Axis(name, spec))
+    if kind == "lhs":
+        return LatinHypercube(*built, samples=samples or 100, seed=seed)
+    return DESIGNS[kind](*built)
+
+
+def batched(iterable, size):
+    """把惰性生成的 case 分批, 每批交给执行后端"""
+    it = iter(iterable)
+    while True:
+        batch = list(itertools.islice(it, size))
+        if not batch:
+            return
+        yield batch
@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import uuid
+import socket
+import sqlite3
+import hashlib
+from abc import ABC, abstractmethod
+from contextlib import closing
+
+from simulation.identity import canonical, code_digest, file_digest
+from simulation.scanner import run_case
+
+
+def work_unit_id(case, run_kwargs, cost_digest="", source_digest=""):
+    """
+    工作单元的内容地址: case 参数 + 求解器设置 + Cost.json 内容 + 源码哈希。
+    相同输入得到相同 id, 因此重复提交 / 跨扫描复用都是幂等的;
+    代码改动后 id 随之改变, 不会复用旧代码算出的结果。
+    """
+    payload = {"case": case, "run": run_kwargs, "cost": cost_digest, "code": source_digest}
+    return hashlib.sha256(canonical(payload).encode()).hexdigest()
+
+
+class WorkQueue(ABC):
+    """
+    分布式扫描的队列接口。实现需要保证:
+      - put 对相同 unit_id 幂等; 已失败的单元重新提交时回到待执行状态
+      - lease 在 lease_seconds 内独占一个单元, 过期后可被其他 worker 重新领取;
+        renew 由持有租约的 worker 定期调用以延长租约
+      - complete 对相同 unit_id 幂等 (重复提交结果不会产生重复记录)
+    缺少任何一个方法的实现在构造时即报错, 而不是扫描进行到一半才失败。
+    """
+
+    @abstractmethod
+    def put(self, unit_id, payload): ...
+    @abstractmethod
+    def lease(self, worker_id, lease_seconds): ...
+    @abstractmethod
+    def renew(self, unit_id, worker_id, lease_seconds): ...
+    @abstractmethod
+    def complete(self, unit_id, worker_id, record): ...
+    @abstractmethod
+    def fail(self, unit_id, worker_id, error): ...
+    @abstractmethod
+    def status(self, unit_ids): ...
+    @abstractmethod
+    def fetch(self, unit_ids): ...
+    @abstractmethod
+    def errors(self, unit_ids): ...
+    @abstractmethod
+    def outstanding(self): ...
+
+
+class SQLiteWorkQueue(WorkQueue):
+    """
+    基于 SQLite 的本地队列 + 结果库, 用于测试和单机多进程。
+    多台机器可以共享同一个文件 (需要支持文件锁的共享存储);
+    真正的集群部署可以按 WorkQueue 接口接入其他消息队列。
+    每次操作都单独打开连接, 因此对象可以直接 pickle 传给子进程。
+    """
+
+    def __init__(self, path, max_attempts=3):
+        self.path = path
+        self.max_attempts = max_attempts
+        with closing(self._connect()) as con:
+            con.executescript("""
+                CREATE TABLE IF NOT EXISTS units (
+                    id TEXT PRIMARY KEY,
+                    payload TEXT NOT NULL,
+                    status TEXT NOT NULL DEFAULT 'pending',
+                    attempts INTEGER NOT NULL DEFAULT 0,
+                    lease_owner TEXT,
+                    lease_expires REAL,
+                    error TEXT
+                );
+                CREATE TABLE IF NOT EXISTS results (
+                    id TEXT PRIMARY KEY,
+                    record TEXT NOT NULL,
+                    worker TEXT,
+                    finished REAL
+                );
+                CREATE INDEX IF NOT EXISTS idx_units_status ON units(status);
+            """)
+
+    def _connect(self):
+        con = sqlite3.connect(self.path, timeout=60.0, isolation_level=None)
+        con.execute("PRAGMA busy_timeout = 60000")
+        return con
+
+    def put(self, unit_id, payload):
+        with closing(self._connect()) as con:
+            # 已失败的单元重新提交时重置为待执行 (重试次数清零)
+            con.execute("INSERT INTO units (id, payload) VALUES (?, ?) "
+                        "ON CONFLICT(id) DO UPDATE SET status='pending', attempts=0, error=NULL "
+                        "WHERE status='failed'",
+                        (unit_id, canonical(payload)))
+
+    def renew(self, unit_id, worker_id, lease_seconds=600.0):
+        """延长自己持有的租约; 租约已被他人领走或单元已结束时返回 False"""
+        with closing(self._connect()) as con:
+            cur = con.execute("UPDATE units SET lease_expires=? WHERE id=? AND status='leased' AND lease_owner=?",
+                              (time.time() + lease_seconds, unit_id, worker_id))
+            return cur.rowcount > 0
+
+    def lease(self, worker_id, lease_seconds=600.0):
+        """领取一个待执行 (或租约已过期) 的单元, 没有可领取的单元时返回 None"""
+        now = time.time()
+        with closing(self._connect()) as con:
+            con.execute("BEGIN IMMEDIATE")
+            try:
+                # 租约过期且重试次数用尽的单元标记为失败
+                con.execute(
+                    "UPDATE units SET status='failed', error=COALESCE(error, 'lease expired') "
+                    "WHERE status='leased' AND lease_expires < ? AND attempts >= ?",
+                    (now, self.max_attempts))
+                row = con.execute(
+                    "SELECT id, payload FROM units "
+                    "WHERE status='pending' OR (status='leased' AND lease_expires < ?) "
+                    "ORDER BY attempts LIMIT 1", (now,)).fetchone()
+                if row is None:
+                    con.execute("COMMIT")
+                    return None
+                con.execute(
+                    "UPDATE units SET status='leased', attempts=attempts+1, "
+                    "lease_owner=?, lease_expires=? WHERE id=?",
+                    (worker_id, now + lease_seconds, row[0]))
+                con.execute("COMMIT")
+            except BaseException:
+                con.execute("ROLLBACK")
+                raise
+        return row[0], json.loads(row[1])
+
+    def complete(self, unit_id, worker_id, record):
+        with closing(self._connect()) as con:
+            con.execute("BEGIN IMMEDIATE")
+            # 结果按 unit_id 去重: 同一单元被两个 worker 跑完时只保留第一份
+            # 记录按原有键顺序序列化, 与本地后端的结果列顺序一致
+            con.execute("INSERT OR IGNORE INTO results (id, record, worker, finished) VALUES (?, ?, ?, ?)",
+                        (unit_id, json.dumps(record, default=float), worker_id, time.time()))
+            con.execute("UPDATE units SET status='done', lease_owner=NULL, lease_expires=NULL, error=NULL "
+                        "WHERE id=?", (unit_id,))
+            con.execute("COMMIT")
+
+    def fail(self, unit_id, worker_id, error):
+        """记录一次失败: 未达到重试上限时放回队列"""
+        with closing(self._connect()) as con:
+            con.execute(
+                "UPDATE units SET status=CASE WHEN attempts >= ? THEN 'failed' ELSE 'pending' END, "
+                "lease_owner=NULL, lease_expires=NULL, error=? WHERE id=? AND status='leased'",
+                (self.max_attempts, str(error), unit_id))
+
+    def status(self, unit_ids):
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                f"SELECT id, status FROM units WHERE id IN ({','.join('?' * len(unit_ids))})",
+                list(unit_ids)).fetchall()
+        return dict(rows)
+
+    def fetch(self, unit_ids):
+        """读取已完成单元的结果 {unit_id: record}"""
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                f"SELECT id, record FROM results WHERE id IN ({','.join('?' * len(unit_ids))})",
+                list(unit_ids)).fetchall()
+        return {k: json.loads(v) for k, v in rows}
+
+    def errors(self, unit_ids):
+        with closing(self._connect()) as con:
+            rows = con.execute(
+                f"SELECT id, error FROM units WHERE status='failed' AND id IN ({','.join('?' * len(unit_ids))})",
+                list(unit_ids)).fetchall()
+        return dict(rows)
+
+    def outstanding(self):
+        """尚未结束 (pending / leased) 的单元数"""
+        with closing(self._connect()) as con:
+            return con.execute("SELECT COUNT(*) FROM units WHERE status IN ('pending', 'leased')").fetchone()[0]
+
+
+def _heartbeat(queue, unit_id, worker_id, lease_seconds, stop):
+    """执行期间每 lease_seconds / 3 续租一次, 长时间的 case 不会因租约过期被重复领取"""
+    while not stop.wait(lease_seconds / 3.0):
+        if not queue.renew(unit_id, worker_id, lease_seconds):
+            return
+
+
+def run_worker(queue, worker_id=None, lease_seconds=600.0, poll=1.0, exit_when_idle=True):
+    """
+    Worker 主循环: 领取 -> 执行 run_case -> 提交结果。
+    执行期间后台线程定期续租 (租约长度 lease_seconds 只需覆盖心跳间隔, 与 case 时长无关)。
+    可以在任意节点上启动 (python main.py worker --queue ...), 只要能访问同一个队列和 Cost.json。
+    返回本 worker 完成的单元数。
+    """
+    import threading
+    worker_id = worker_id or f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:6]}"
+    done = 0
+    while True:
+        item = queue.lease(worker_id, lease_seconds)
+        if item is None:
+            if exit_when_idle and queue.outstanding() == 0:
+                return done
+            time.sleep(poll)
+            continue
+
+        unit_id, payload = item
+        stop = threading.Event()
+        beat = threading.Thread(target=_heartbeat, args=(queue, unit_id, worker_id, lease_seconds, stop),
+                                daemon=True)
+        beat.start()
+        try:
+            record, _ = run_case(**payload["case"], **payload["run"])
+            if record is None:
+                raise RuntimeError("simulation returned no result")
+        except Exception as e:
+            queue.fail(unit_id, worker_id, f"{type(e).__name__}: {e}")
+            continue
+        finally:
+            stop.set()
+            beat.join()
+        # 出处随结果一起存入队列: 记录计算它的 worker
+        record["Backend"] = f"distributed({worker_id})"
+        queue.complete(unit_id, worker_id, record)
+        done += 1
+
+
+class DistributedBackend:
+    """
+    Scanner 的分布式执行后端。
+    把每个 case 拆成内容寻址的工作单元写入队列, 可选地在本机启动 local_workers 个 worker 进程,
+    然后等待所有单元结束并按 case 顺序返回结果。已完成的单元 (包括以前扫描留下的) 直接复用。
+    """
+    name = "distributed"
+
+    def __init__(self, queue, local_workers=0, poll=1.0, timeout=None, cost_file="Cost.json", lease_seconds=600.0):
+        self.queue = queue
+        self.local_workers = local_workers
+        self.lease_seconds = lease_seconds
+        self.poll = poll
+        self.timeout = timeout
+        self.cost_file = cost_file
+
+    def run(self, cases, **run_kwargs):
+        # 远程 worker 只回传结果记录, 不回传 profiler 对象 (prof_* 列仍在记录中)
+        run_kwargs = dict(run_kwargs, trace=False)
+        cost_digest = file_digest(self.cost_file) if os.path.exists(self.cost_file) else ""
+        source_digest = code_digest()
+
+        ids = []
+        for case in cases:
+            unit_id = work_unit_id(case, run_kwargs, cost_digest, source_digest)
+            self.queue.put(unit_id, {"case": case, "run": run_kwargs})
+            ids.append(unit_id)
+        unique = list(dict.fromkeys(ids))
+
+        pool = None
+        if self.local_workers > 0:
+            from concurrent.futures import ProcessPoolExecutor
+            pool = ProcessPoolExecutor(max_workers=self.local_workers)
+            for _ in range(self.local_workers):
+                pool.submit(run_worker, self.queue, None, self.lease_seconds, self.poll)
+
+        try:
+            t0 = time.time()
+            while True:
+                states = self.queue.status(unique)
+                if all(s in ("done", "failed") for s in states.values()):
+                    break
+                if self.timeout is not None and time.time() - t0 > self.timeout:
+                    raise TimeoutError(f"distributed scan did not finish within {self.timeout} s")
+                time.sleep(self.poll)
+        finally:
+            if pool is not None:
+                pool.shutdown(wait=True)
+
+        results = self.queue.fetch(unique)
+        failed = self.queue.errors(unique)
+        for unit_id, error in failed.items():
+            print(f"Warning: work unit {unit_id[:12]} failed: {error}")
+        return [(results.get(unit_id), None) for unit_id in ids]
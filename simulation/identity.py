@@ -0,0 +1,41 @@
+import os
+import glob
+import json
+import hashlib
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# 影响仿真结果的源码: 参数, 求解器, 模型, 仿真流程
+CODE_FILES = ("config.py", "solver.py", "models/*.py", "simulation/*.py")
+
+_CACHE = {}
+
+
+def canonical(obj):
+    """稳定的 JSON 序列化 (键排序, numpy 标量转 float), 用于计算内容地址和比较输入"""
+    return json.dumps(obj, sort_keys=True, separators=(",", ":"), default=float)
+
+
+def file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def code_digest():
+    """
+    影响结果的源码 (CODE_FILES) 的内容哈希, 每个进程只计算一次。
+    分布式工作单元 id 和结果记录的 Code_Version 都由它得到, 模型或求解器改动后两者同时改变。
+    """
+    if "code" not in _CACHE:
+        digest = hashlib.sha256()
+        for pattern in CODE_FILES:
+            for path in sorted(glob.glob(os.path.join(PROJECT_ROOT, pattern))):
+                digest.update(os.path.relpath(path, PROJECT_ROOT).encode())
+                with open(path, "rb") as f:
+                    digest.update(f.read())
+        _CACHE["code"] = digest.hexdigest()
+    return _CACHE["code"]
+
+
+def code_version():
+    """结果记录中的代码版本: code_digest 的前 16 位"""
+    return code_digest()[:16]
@@ -0,0 +1,144 @@
+import os
+import json
+import time
+import logging
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+
+logger = logging.getLogger("spme.profiling")
+
+
+class Profiler:
+    """
+    可选的性能计数器 / 分阶段计时器。
+
+    默认关闭: simulator 和 Scanner 在 profiler=None 时不做任何包装,
+    因此生产运行中没有额外开销。开启后:
+      - counters: 导数调用次数、拒绝步数、事件次数等
+      - phases:   每个阶段累计的墙钟时间 (秒) 和调用次数
+      - trace:    可选的 Chrome trace 事件 (chrome://tracing / Perfetto)
+    """
+
+    def __init__(self, trace=False):
+        self.counters = defaultdict(int)
+        self.phase_time = defaultdict(float)
+        self.phase_calls = defaultdict(int)
+        self.trace = trace
+        self.trace_events = []
+        self._t_origin = time.perf_counter()
+
+    # --- 计数 ---
+    def count(self, name, n=1):
+        self.counters[name] += n
+
+    # --- 计时 ---
+    def add_time(self, name, seconds, calls=1):
+        self.phase_time[name] += seconds
+        self.phase_calls[name] += calls
+
+    def record(self, name, t0, **args):
+        """记录一个从 t0 (perf_counter) 到现在的阶段, 开启 trace 时同时生成事件"""
+        t1 = time.perf_counter()
+        self.add_time(name, t1 - t0)
+        if self.trace:
+            self.trace_events.append({
+                "name": name, "ph": "X", "cat": "spme",
+                "ts": (t0 - self._t_origin) * 1e6,
+                "dur": (t1 - t0) * 1e6,
+                "pid": os.getpid(), "tid": threading.get_ident(),
+                "args": args,
+            })
+
+    @contextmanager
+    def phase(self, name, **args):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, t0, **args)
+
+    # --- 汇总 ---
+    def merge(self, other):
+        """把另一个 Profiler (例如单个 case) 的统计累加进来"""
+        for k, v in other.counters.items():
+            self.counters[k] += v
+        for k, v in other.phase_time.items():
+            self.phase_time[k] += v
+        for k, v in other.phase_calls.items():
+            self.phase_calls[k] += v
+        if self.trace:
+            # 对齐时间原点, 保证多个 case 在同一条时间轴上
+            shift = (other._t_origin - self._t_origin) * 1e6
+            for ev in other.trace_events:
+                ev = dict(ev)
+                ev["ts"] += shift
+                self.trace_events.append(ev)
+
+    def summary(self):
+        """扁平化的统计字典, 可直接并入扫描结果记录"""
+        out = {}
+        for k in sorted(self.counters):
+            out[f"n_{k}"] = self.counters[k]
+        for k in sorted(self.phase_time):
+            out[f"t_{k}_s"] = self.phase_time[k]
+        return out
+
+    def log_summary(self, label, level=logging.INFO):
+        """以结构化 JSON 形式输出到 spme.profiling logger"""
+        if logger.isEnabledFor(level):
+            logger.log(level, json.dumps({"label": label, **self.summary()}, sort_keys=True))
+
+    def write_chrome_trace(self, path):
+        with open(path, "w") as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
+
+
+class InstrumentedSystem:
+    """
+    包装 BatterySystem, 统计 derivatives / calculate_state 的调用次数和耗时。
+    只在开启 profiler 时才会使用, 关闭时 solver 直接调用原对象。
+    """
+
+    def __init__(self, system, profiler):
+        self._system = system
+        self._prof = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._system, name)
+
+    def derivatives(self, t, y, ext):
+        t0 = time.perf_counter()
+        dy = self._system.derivatives(t, y, ext)
+        self._prof.add_time("derivatives", time.perf_counter() - t0)
+        self._prof.counters["derivative_evals"] += 1
+        return dy
+
+    def calculate_state(self, t, y, ext):
+        t0 = time.perf_counter()
+        new_ext = self._system.calculate_state(t, y, ext)
+        self._prof.add_time("calculate_state", time.perf_counter() - t0)
+        return new_ext
+
+
+class InstrumentedDevice:
+    """包装 DeviceState, 统计 calculate_power_mw / calculate_heat_mw 的耗时"""
+
+    def __init__(self, device, profiler):
+        self._device = device
+        self._prof = profiler
+
+    def __getattr__(self, name):
+        return getattr(self._device, name)
+
+    def calculate_power_mw(self):
+        t0 = time.perf_counter()
+        p = self._device.calculate_power_mw()
+        self._prof.add_time("device_power", time.perf_counter() - t0)
+        return p
+
+    def calculate_heat_mw(self):
+        t0 = time.perf_counter()
+        q = self._device.calculate_heat_mw()
+        self._prof.add_time("device_heat", time.perf_counter() - t0)
+        return q
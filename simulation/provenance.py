@@ -0,0 +1,162 @@
+import os
+import json
+import hashlib
+
+from models.battery_model import base_params
+from simulation.identity import canonical, code_version, file_digest
+
+
+def cost_hash(path="Cost.json"):
+    """Cost.json 的内容哈希 (文件不存在时为空串)"""
+    return file_digest(path)[:16] if os.path.exists(path) else ""
+
+
+def param_hash(param_overrides=None):
+    """覆盖后完整参数表的哈希 (config 基准值 + param_overrides)"""
+    params = dict(base_params())
+    params.update(param_overrides or {})
+    return hashlib.sha256(canonical(params).encode()).hexdigest()[:16]
+
+
+def run_fields(solver_options=None, model_options=None, backend="serial"):
+    """
+    执行方的出处信息, 在实际计算结果的进程中取值 (分布式 worker / 进程池子进程各自计算)。
+    backend: 执行方式的说明, 例如 "serial", "process-pool(4)", "distributed(host:pid)"
+    """
+    return {
+        "Solver": canonical(solver_options or {}),
+        "Model": canonical(model_options or {}),
+        "Cost_Hash": cost_hash(),
+        "Code_Version": code_version(),
+        "Backend": backend,
+    }
+
+
+def case_fields(case):
+    """
+    描述一行结果输入的字段。除哈希外还记录参数覆盖和时长,
+    使结果文件中的每一行都能被 check_reproducibility 重放。
+    """
+    overrides = case.get("param_overrides") or {}
+    return {
+        "Param_Hash": param_hash(overrides),
+        "Param_Overrides": canonical(overrides),
+        "Duration_s": case["duration"],
+    }
+
+
+def stamp(record, case, solver_options=None, model_options=None, backend="serial"):
+    """给结果记录加上出处信息 (原地修改并返回), 由 run_case 在计算结果的进程中调用"""
+    record.update(case_fields(case))
+    record.update(run_fields(solver_options, model_options, backend))
+    return record
+
+
+def summary_fields(records):
+    """
+    派生记录 (例如寿命积分汇总) 的出处: 合并来源记录的出处字段 (取值不同时以 ";" 连接),
+    并用 Derived_From 标明来源, 复现检查不重放派生记录。
+    """
+    out = {}
+    for key in ("Param_Hash", "Param_Overrides", "Duration_s", "Solver", "Model", "Cost_Hash",
+                "Code_Version", "Backend"):
+        values = list(dict.fromkeys(r[key] for r in records if key in r))
+        if values:
+            out[key] = values[0] if len(values) == 1 else ";".join(str(v) for v in values)
+    types = list(dict.fromkeys(r["Type"] for r in records))
+    out["Derived_From"] = f"{len(records)} x {';'.join(types)}"
+    return out
+
+
+def replay_case(record):
+    """由带出处信息的记录还原 run_case 的参数"""
+    return dict(
+        soh=float(record["SOH_Start"]),
+        app_name=record["App"],
+        duration=float(record["Duration_s"]),
+        scan_type=record["Type"],
+        param_overrides=json.loads(record["Param_Overrides"]) or None,
+    )
+
+
+def _text(record, key):
+    """字符串字段 (从 CSV 读回的缺失值为 NaN, 视为空串)"""
+    value = record.get(key)
+    return value if isinstance(value, str) else ""
+
+
+def load_records(path):
+    """读取结果文件 (CSV 或 .store 结果库) 为记录列表; 出处字段按字符串读取"""
+    if path.rstrip("/").endswith(".store"):
+        from simulation.result_store import ResultStore
+        return ResultStore.open(path).to_records()
+    import pandas as pd
+    text = {k: str for k in ("Param_Hash", "Param_Overrides", "Solver", "Model", "Cost_Hash",
+                             "Code_Version", "Backend", "Input_Hash", "Derived_From")}
+    return pd.read_csv(path, dtype=text, float_precision="round_trip").to_dict("records")
+
+
+def check_reproducibility(records, sample=10, seed=0, reference_solver=None, report=print):
+    """
+    复现检查: 从结果记录中随机抽取 sample 条, 按记录中的模型设置在参考路径上串行重放
+    (默认固定步长 RK4, dt=1 s, 不开启准静态 / 续算 / 提前停止), 比较衰减速率 (相对偏差)
+    和平均温度 (绝对偏差, C)。
+    同时检查记录中的参数哈希, Cost.json 哈希和代码版本是否与当前一致 (不一致时重放结果不可比)。
+    返回 {"n": 抽样数, "max_rate_rel_dev", "max_temp_abs_dev", "mismatches": [...], "rows": [...]}。
+    """
+    import numpy as np
+    from simulation.scanner import run_case
+
+    records = [r for r in records if isinstance(r.get("Param_Overrides"), str) and r["Param_Overrides"]
+               and not _text(record=r, key="Derived_From")]
+    if not records:
+        raise ValueError("No records with provenance metadata (Param_Overrides / Duration_s) to replay")
+    rng = np.random.default_rng(seed)
+    picks = sorted(rng.choice(len(records), size=min(sample, len(records)), replace=False))
+
+    current = {"Cost_Hash": cost_hash(), "Code_Version": code_version()}
+    mismatches = set()
+    rows = []
+    for i in picks:
+        record = records[i]
+        case = replay_case(record)
+        if _text(record, "Param_Hash") != param_hash(case["param_overrides"]):
+            mismatches.add("Param_Hash")
+        for key, value in current.items():
+            if _text(record, key) != value:
+                mismatches.add(key)
+
+        model = json.loads(_text(record, "Model") or "{}")
+        ref, _ = run_case(**case, solver_options=reference_solver, model_options=model or None)
+        if ref is None:
+            rows.append({"index": int(i), "App": case["app_name"], "SOH_Start": case["soh"], "failed": True})
+            continue
+        rate, ref_rate = float(record["Aging_Rate_Hr"]), ref["Aging_Rate_Hr"]
+        rows.append({
+            "index": int(i),
+            "App": case["app_name"],
+            "SOH_Start": case["soh"],
+            "rate_rel_dev": abs(rate - ref_rate) / abs(ref_rate) if ref_rate else abs(rate),
+            "temp_abs_dev": abs(float(record["Avg_Temp_C"]) - ref["Avg_Temp_C"]),
+        })
+        if report is not None:
+            r = rows[-1]
+            report(f"[Repro] #{r['index']:<5} SOH:{r['SOH_Start']:.3f} | App:{r['App'][:15]:<15} "
+                   f"| rate dev {r['rate_rel_dev']:.2e} | T dev {r['temp_abs_dev']:.2e} C")
+
+    ok = [r for r in rows if not r.get("failed")]
+    result = {
+        "n": len(rows),
+        "max_rate_rel_dev": max((r["rate_rel_dev"] for r in ok), default=np.nan),
+        "max_temp_abs_dev": max((r["temp_abs_dev"] for r in ok), default=np.nan),
+        "mismatches": sorted(mismatches),
+        "rows": rows,
+    }
+    if report is not None:
+        report(f"[Repro] {result['n']} cases replayed on the reference path: "
+               f"max rate deviation {result['max_rate_rel_dev']:.3e} (relative), "
+               f"max temperature deviation {result['max_temp_abs_dev']:.3e} C")
+        if mismatches:
+            report(f"[Repro] Warning: provenance differs from the current tree ({', '.join(result['mismatches'])}); "
+                   f"deviations may reflect changed inputs rather than the execution path")
+    return result
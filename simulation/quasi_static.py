@@ -0,0 +1,217 @@
+import numpy as np
+import config as c
+
+from models.power_model import load_plan
+from models import make_system
+from solver import SOLVERS, make_solver
+from simulation.simulator import run_single_static_test
+
+
+def consistent_ext(system, y, ext, n_iter=5):
+    """在固定状态 y 下迭代 calculate_state, 使 I = P/V 与端电压自洽"""
+    for _ in range(n_iter):
+        ext = system.calculate_state(0.0, y, ext)
+    return ext
+
+
+def _fast_residual(system, y, ext, idx, z):
+    """快变量取 z 时的导数 (其余状态保持 y)"""
+    y_try = y.copy()
+    y_try[idx] = z
+    e = consistent_ext(system, y_try, ext)
+    return system.derivatives(0.0, y_try, e)[idx]
+
+
+def _fast_jacobian(system, y, ext, idx, z, r):
+    """快变量导数对快变量的有限差分 Jacobian (快变量只有几个)"""
+    J = np.empty((len(idx), len(idx)))
+    for j in range(len(idx)):
+        dz = 1e-7 * max(abs(z[j]), 1.0)
+        z_p = z.copy()
+        z_p[j] += dz
+        J[:, j] = (_fast_residual(system, y, ext, idx, z_p) - r) / dz
+    return J
+
+
+def solve_steady_state(system, y0, ext, tol=1e-10, max_iter=50):
+    """
+    冻结慢变量 (浓度, SEI, 析锂量), 用阻尼 Newton 法求快变量 system.IDX_FAST 的稳态:
+        derivatives(y)[IDX_FAST] = 0
+    Jacobian 用有限差分 (快变量只有几个)。
+    返回 (y_ss, ext_ss, dy_ss, 迭代次数); 不收敛时抛出 RuntimeError。
+    """
+    idx = getattr(system, "IDX_FAST", None)
+    if not idx:
+        raise ValueError(f"{type(system).__name__} does not support quasi-static mode")
+
+    y = np.array(y0, dtype=float)
+    atol = np.asarray(system.ATOL, dtype=float)[idx]
+    residual = lambda z: _fast_residual(system, y, ext, idx, z)
+
+    z = y[idx].copy()
+    r = residual(z)
+    for it in range(1, max_iter + 1):
+        step = np.linalg.solve(_fast_jacobian(system, y, ext, idx, z, r), -r)
+
+        # 阻尼: 残差不下降时步长减半
+        lam = 1.0
+        while True:
+            z_new = z + lam * step
+            r_new = residual(z_new)
+            if np.linalg.norm(r_new) < np.linalg.norm(r) or lam < 1e-3:
+                break
+            lam *= 0.5
+        z, r = z_new, r_new
+        if np.all(np.abs(lam * step) <= tol * np.abs(z) + atol):
+            y[idx] = z
+            ext_ss = consistent_ext(system, y, ext)
+            return y, ext_ss, system.derivatives(0.0, y, ext_ss), it
+
+    raise RuntimeError(f"steady state did not converge in {max_iter} Newton iterations")
+
+
+def aging_rate(system, y, ext, dy, hours=1.0):
+    """由稳态导数线性外推的 SOH 衰减速率 (1/小时)"""
+    ext_later = system.calculate_state(0.0, y + dy * hours * 3600.0, ext)
+    return (ext.SOH - ext_later.SOH) / hours
+
+
+def relaxation_time(system, y, ext):
+    """快变量最慢的弛豫时间常数 (s): 稳态处快变量 Jacobian 特征值实部绝对值最小者的倒数"""
+    idx = system.IDX_FAST
+    z = np.array(y, dtype=float)[idx]
+    J = _fast_jacobian(system, y, ext, idx, z, _fast_residual(system, y, ext, idx, z))
+    return 1.0 / max(np.min(np.abs(np.linalg.eigvals(J).real)), 1e-12)
+
+
+def _advance(system, solver, ext, t_end, dt):
+    """
+    把 solver 积分到 t_end (恒定负载, 每步按 I = P/V 更新电流)。
+    返回 (ext, 温度对时间的积分 K*s (梯形), 是否触发低压保护)。
+    """
+    T_int = 0.0
+    while solver.t < t_end:
+        if ext.V > 0.1:
+            ext.I = ext.P / ext.V
+        t_prev, T_prev = solver.t, system.temperature(solver.state)
+        ext = solver.step(system, min(dt, t_end - solver.t), ext)
+        T_int += 0.5 * (T_prev + system.temperature(solver.state)) * (solver.t - t_prev)
+        if ext.V < 2.5:
+            return ext, T_int, True
+    return ext, T_int, False
+
+
+def run_quasi_static_test(y0, ext_state, app_profile_name, duration=3600, internal_params=None,
+                          profiler=None, solver_options=None, model_options=None,
+                          verify_duration=600.0, temp_tol=0.1, rate_rtol=0.01, report=None):
+    """
+    准静态快速模式 (恒定 DeviceState), 结果与完整瞬态仿真 run_single_static_test 可比:
+      1. 直接求热稳态 (以及动态浓差稳态), 得到稳态温度 T_ss 和瞬时衰减速率 r_ss
+      2. 从稳态出发用自适应求解器积分整个 duration: 解很平滑, 步数很少,
+         SOC 下降和 SEI 增长带来的速率漂移完整计入
+      3. 升温段修正: 完整仿真从环境温度出发, 快变量按时间常数 tau (稳态 Jacobian 的最慢特征值) 弛豫。
+         从冷态实际积分窗口 W = min(duration, max(verify_duration, 3 tau)), 与从稳态出发的同一窗口相减
+         得到实测的升温亏损; W 之后的尾部按指数弛豫 (r_ss - r_0) * tau * (exp(-W/tau) - exp(-D/tau)) 补上
+      4. 校验: 窗口内指数模型预测的亏损与实测亏损之差 (即尾部修正的误差上界) 满足
+         速率 <= rate_rtol * 总损失, 平均温度 <= temp_tol (K); 否则 (或积分中触发低压保护)
+         退回完整瞬态仿真
+
+    输入输出与 run_single_static_test 相同: (SOH衰减速率/小时, 平均温度 C)。
+    report: 可选的字典, 写入稳态细节 (T_ss_C, I, Phi_Anode, I_Plating, tau_s) 和校验结果
+            (warmup_window, warmup_rate_dev, warmup_temp_dev, verified)
+    """
+    report = {} if report is None else report
+    y0_lumped = y0
+    fallback = lambda: run_single_static_test(
+        y0_lumped, ext_state, app_profile_name, duration=duration, internal_params=internal_params,
+        profiler=profiler, solver_options=solver_options, model_options=model_options)
+
+    system = make_system(internal_params, **(model_options or {}))
+    if getattr(system, "IDX_FAST", None) is None:
+        report["fallback"] = "model has no quasi-static mode"
+        return fallback()
+    y0 = np.array(system.initial_state(y0) if hasattr(system, "initial_state") else y0, dtype=float)
+
+    try:
+        plan = load_plan("Cost.json")
+    except FileNotFoundError:
+        print("Error: Cost.json not found.")
+        return None, None
+    if app_profile_name not in plan.profiles:
+        print(f"Warning: Profile '{app_profile_name}' not found.")
+        return None, None
+    device_state = plan.profiles[app_profile_name]
+
+    ext = ext_state
+    ext.P = device_state.calculate_power_mw() / 1000.0 / c.N_PARALLEL
+    ext.Q = device_state.calculate_heat_mw() / 1000.0
+    if ext.V > 0.1:
+        ext.I = ext.P / ext.V
+
+    # 1. 稳态 + 瞬时速率
+    try:
+        if profiler is not None:
+            with profiler.phase("steady_state"):
+                y_ss, ext_ss, dy_ss, n_iter = solve_steady_state(system, y0, ext)
+        else:
+            y_ss, ext_ss, dy_ss, n_iter = solve_steady_state(system, y0, ext)
+        tau = relaxation_time(system, y_ss, ext_ss)
+    except (RuntimeError, np.linalg.LinAlgError) as e:
+        report["fallback"] = str(e)
+        return fallback()
+    T_ss = system.temperature(y_ss)
+    report.update(T_ss_C=T_ss - 273.15, I=ext_ss.I, Phi_Anode=ext_ss.Phi_Anode,
+                  I_Plating=ext_ss.I_Plating, newton_iters=n_iter, tau_s=tau)
+
+    # 固定步长求解器换成自适应 RK45 (dt 作为最大步长), 避免逐秒积分
+    opts = dict(solver_options or {})
+    if not SOLVERS[opts.get("name", "rk4")].adaptive:
+        opts.update(name="rk45", dt=duration)
+    if opts.get("atol") is None:
+        opts["atol"] = system.ATOL
+    dt = opts.get("dt", duration)
+    window = min(duration, max(verify_duration, 3.0 * tau))
+
+    # 2. 从稳态出发: 先到窗口末端, 再到 duration
+    try:
+        hot = make_solver(0.0, y_ss, **opts)
+        ext_w, T_hot_w, low_w = _advance(system, hot, consistent_ext(system, y_ss, ext_ss), window, dt)
+        ext_end, T_hot_rest, low_end = _advance(system, hot, ext_w, duration, dt)
+
+        # 3. 从冷态出发积分升温窗口
+        ext_0 = consistent_ext(system, y0, ext)
+        cold = make_solver(0.0, y0, **opts)
+        ext_cold, T_cold_w, low_cold = _advance(system, cold, ext_0, window, dt)
+    except RuntimeError as e:
+        report["fallback"] = str(e)
+        return fallback()
+    if low_w or low_end or low_cold:
+        report["fallback"] = "low-voltage cutoff during verification"
+        return fallback()
+
+    loss_hot = ext_ss.SOH - ext_end.SOH
+    deficit = (ext_ss.SOH - ext_w.SOH) - (ext_0.SOH - ext_cold.SOH)
+    T_deficit = T_hot_w - T_cold_w
+    # 指数弛豫模型: 亏损 = (x_ss - x_0) * tau * (1 - exp(-t/tau))
+    r_0 = aging_rate(system, y0, ext_0, system.derivatives(0.0, y0, ext_0)) / 3600.0
+    r_ss = aging_rate(system, y_ss, ext_ss, dy_ss) / 3600.0
+    T_0 = system.temperature(y0)
+    decay = lambda t: tau * (1.0 - np.exp(-t / tau))
+    tail = decay(duration) - decay(window)
+
+    loss = loss_hot - deficit - (r_ss - r_0) * tail
+    T_avg = (T_hot_w + T_hot_rest - T_deficit - (T_ss - T_0) * tail) / duration
+    rate_dev = abs((r_ss - r_0) * decay(window) - deficit) / max(abs(loss), 1e-300)
+    temp_dev = abs((T_ss - T_0) * decay(window) - T_deficit) / duration
+    verified = rate_dev <= rate_rtol and temp_dev <= temp_tol
+    report.update(warmup_window=window, warmup_rate_dev=rate_dev, warmup_temp_dev=temp_dev,
+                  verified=bool(verified))
+
+    if profiler is not None:
+        profiler.count("quasi_static")
+    if not verified:
+        print(f"Warning: quasi-static check failed for '{app_profile_name}' "
+              f"(warm-up model off by {rate_dev:.2%} in rate, {temp_dev:.3f} K), running full transient")
+        report["fallback"] = "verification failed"
+        return fallback()
+    return loss / (duration / 3600.0), T_avg - 273.15
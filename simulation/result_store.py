@@ -0,0 +1,204 @@
+import os
+import json
+import numpy as np
+
+
+class ResultStore:
+    """
+    按维度组织的扫描结果库 (目录), 每个变量一个带类型的 .npy 数组, 读取时内存映射。
+
+    目录结构:
+      <path>/index.json   维度名, 各维坐标, 变量的 dtype 和所属维度
+      <path>/<var>.npy    变量数组, 形状由其维度的坐标个数决定 (C 顺序, 第一维最慢)
+
+    与 CSV 相比不需要解析文本, 也不需要把整张表读进内存再透视:
+    select() 只按需读取所选切片对应的页, 大型扫描画一张热力图只需要几个小切片。
+    """
+
+    INDEX = "index.json"
+
+    def __init__(self, path, index, mode="r"):
+        self.path = path
+        self.dims = list(index["dims"])
+        self.coords = {d: list(v) for d, v in index["coords"].items()}
+        self.variables = {k: dict(v) for k, v in index["variables"].items()}
+        self.mode = mode
+        self._arrays = {}
+
+    # --- 创建 / 打开 ---
+    @classmethod
+    def create(cls, path, coords, variables):
+        """
+        coords:    {维度名: 坐标列表}, 维度顺序即存储顺序
+        variables: {变量名: dtype} (所有维度) 或 {变量名: (dtype, [维度...])}
+        新建的数组: 浮点填 NaN, 字符串填空串, 其余填 0
+        """
+        os.makedirs(path, exist_ok=True)
+        index = {"dims": list(coords), "coords": {d: _plain(v) for d, v in coords.items()}, "variables": {}}
+        for name, spec in variables.items():
+            dtype, dims = (spec, list(coords)) if not isinstance(spec, (tuple, list)) else spec
+            index["variables"][name] = {"dtype": np.dtype(dtype).str, "dims": list(dims)}
+        with open(os.path.join(path, cls.INDEX), "w") as f:
+            json.dump(index, f, indent=1)
+
+        store = cls(path, index, mode="r+")
+        for name, info in store.variables.items():
+            shape = tuple(len(store.coords[d]) for d in info["dims"])
+            arr = np.lib.format.open_memmap(store._file(name), mode="w+", dtype=info["dtype"], shape=shape)
+            arr[...] = np.nan if arr.dtype.kind == "f" else ("" if arr.dtype.kind == "U" else 0)
+            store._arrays[name] = arr
+        return store
+
+    @classmethod
+    def open(cls, path, mode="r"):
+        with open(os.path.join(path, cls.INDEX), "r") as f:
+            return cls(path, json.load(f), mode=mode)
+
+    @classmethod
+    def from_records(cls, path, records, dims):
+        """
+        把扫描结果记录 (字典列表) 写成结果库。dims 中的列作为维度 (坐标按首次出现顺序),
+        其余列作为变量: 数值列为 float64, 其他列为定长字符串。
+        dims 必须唯一确定每条记录; 有重复的坐标组合时抛出 ValueError (而不是静默覆盖),
+        此时应加入区分它们的列 (非网格扫描可用序号列 Case, 见 Scanner.run_design)。
+        """
+        seen = {}
+        for r in records:
+            key = tuple(r[d] for d in dims)
+            seen[key] = seen.get(key, 0) + 1
+        duplicates = [k for k, n in seen.items() if n > 1]
+        if duplicates:
+            raise ValueError(f"{len(duplicates)} index tuples over dims {tuple(dims)} occur more than once "
+                             f"(e.g. {duplicates[0]!r}); add a dimension that tells these records apart")
+
+        coords = {d: list(dict.fromkeys(r[d] for r in records)) for d in dims}
+        columns = list(dict.fromkeys(k for r in records for k in r if k not in dims))
+        variables = {}
+        for col in columns:
+            values = [r[col] for r in records if r.get(col) is not None]
+            if all(isinstance(v, (int, float, bool, np.number, np.bool_)) for v in values):
+                variables[col] = "f8"
+            else:
+                variables[col] = f"<U{max((len(str(v)) for v in values), default=1)}"
+
+        store = cls.create(path, coords, variables)
+        lookup = {d: {v: i for i, v in enumerate(coords[d])} for d in dims}
+        for r in records:
+            idx = tuple(lookup[d][r[d]] for d in dims)
+            for col in columns:
+                if r.get(col) is not None:
+                    store._arrays[col][idx] = r[col]
+        store.flush()
+        return store
+
+    # --- 读写 ---
+    def _file(self, name):
+        return os.path.join(self.path, f"{name}.npy")
+
+    def array(self, name):
+        """变量的内存映射数组 (不会把数据读入内存)"""
+        if name not in self._arrays:
+            if name not in self.variables:
+                raise KeyError(f"Unknown variable '{name}', available: {sorted(self.variables)}")
+            self._arrays[name] = np.load(self._file(name), mmap_mode=self.mode)
+        return self._arrays[name]
+
+    def _locate(self, dim, value):
+        coords = self.coords[dim]
+        if isinstance(value, (int, float, np.number)) and not isinstance(value, bool):
+            hits = [i for i, c in enumerate(coords)
+                    if isinstance(c, (int, float)) and np.isclose(c, value, rtol=1e-12, atol=0.0)]
+        else:
+            hits = [i for i, c in enumerate(coords) if c == value]
+        if not hits:
+            raise KeyError(f"{value!r} not found in dimension '{dim}'")
+        return hits[0]
+
+    def select(self, name, **sel):
+        """
+        按坐标值切片, 例如 select("Aging_Rate_Hr", SOH_Start=0.9, App=["idle", "gaming"])。
+        标量选择去掉该维, 列表保留该维 (按给定顺序), 未指定的维保留全部。
+        只读取切片涉及的数据, 返回普通 numpy 数组。
+        """
+        info = self.variables[name]
+        unknown = set(sel) - set(info["dims"])
+        if unknown:
+            raise KeyError(f"Variable '{name}' has no dimension(s) {sorted(unknown)}; dims: {info['dims']}")
+
+        arr = self.array(name)
+        # 先用基本切片 (标量) 降维, 再逐维做整数索引, 避免一次性高级索引产生广播
+        key = []
+        for d in info["dims"]:
+            value = sel.get(d, slice(None))
+            if isinstance(value, slice):
+                key.append(value)
+            elif isinstance(value, (list, tuple, np.ndarray)):
+                key.append(slice(None))
+            else:
+                key.append(self._locate(d, value))
+        out = arr[tuple(key)]
+
+        axis = 0
+        for d in info["dims"]:
+            value = sel.get(d)
+            if isinstance(value, (list, tuple, np.ndarray)):
+                out = np.take(out, [self._locate(d, v) for v in value], axis=axis)
+            if not (d in sel and not isinstance(value, (list, tuple, np.ndarray, slice))):
+                axis += 1
+        return np.array(out)
+
+    def reduce(self, name, over, func=np.nanmean, **sel):
+        """
+        沿命名维度归约, 例如 reduce("Aging_Rate_Hr", over="App", func=np.nanmax, SOH_Start=0.9)。
+        over 可以是单个维度名或列表; sel 先按 select() 的规则切片。
+        返回 (数组, 剩余维度名列表)。
+        """
+        over = [over] if isinstance(over, str) else list(over)
+        kept = [d for d in self.variables[name]["dims"]
+                if not (d in sel and not isinstance(sel[d], (list, tuple, np.ndarray, slice)))]
+        missing = set(over) - set(kept)
+        if missing:
+            raise KeyError(f"Cannot reduce over {sorted(missing)}; remaining dims: {kept}")
+        out = func(self.select(name, **sel), axis=tuple(kept.index(d) for d in over))
+        return out, [d for d in kept if d not in over]
+
+    def to_xarray(self, names=None):
+        """转成 xarray.Dataset (惰性导入 xarray; 数据仍是内存映射数组)"""
+        import xarray as xr
+        names = list(self.variables) if names is None else list(names)
+        return xr.Dataset(
+            {k: (self.variables[k]["dims"], self.array(k)) for k in names},
+            coords={d: self.coords[d] for d in self.dims},
+        )
+
+    def to_records(self):
+        """展开成记录列表 (每个坐标组合一条, 与 from_records 的输入格式相同; 浮点 NaN 的格点被跳过)"""
+        names = [k for k, v in self.variables.items() if v["dims"] == self.dims]
+        arrays = {k: self.array(k) for k in names}
+        records = []
+        for idx in np.ndindex(*(len(self.coords[d]) for d in self.dims)):
+            record = {d: self.coords[d][i] for d, i in zip(self.dims, idx)}
+            for k, arr in arrays.items():
+                value = arr[idx]
+                record[k] = value.item() if isinstance(value, np.generic) else value
+            if all(isinstance(record[k], float) and np.isnan(record[k])
+                   for k in names if arrays[k].dtype.kind == "f"):
+                continue
+            records.append(record)
+        return records
+
+    def write(self, name, value, **sel):
+        """写入单个位置 (所有维度都需给出坐标)"""
+        info = self.variables[name]
+        idx = tuple(self._locate(d, sel[d]) for d in info["dims"])
+        self.array(name)[idx] = value
+
+    def flush(self):
+        for arr in self._arrays.values():
+            if isinstance(arr, np.memmap):
+                arr.flush()
+
+
+def _plain(values):
+    """坐标转成可 JSON 序列化的 Python 标量"""
+    return [v.item() if isinstance(v, np.generic) else v for v in values]
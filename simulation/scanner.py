@@ -1,140 +1,495 @@
+import os
 import json
-import pandas as pd
+import time
 import numpy as np
-import config as c
 from simulation.init_utils import get_initial_state_by_soh
 from simulation.simulator import run_single_static_test
+from simulation.profiling import Profiler
+from simulation import provenance
+from simulation.design import Axis, FullFactorial, OneAtATime, batched
 
 class Scanner:
-    def __init__(self):
+    def __init__(self, profile=False, trace_path=None, workers=1, solver_options=None, backend=None,
+                 model_options=None, dedup=True):
+        """
+        profile:        开启逐 case / 逐扫描的性能统计 (写入结果表的 prof_* 列)
+        trace_path:     若给出, 每次保存结果时额外写出 Chrome trace JSON
+        workers:        并行进程数 (1 为串行)
+        solver_options: 传给 run_single_static_test 的求解器设置, 例如 {"name": "rk45", "rtol": 1e-6}
+        model_options:  模型选择, 例如 {"name": "spme", "n_r": 50, "n_x": 50} (默认集总模型)
+        backend:        可选的执行后端 (例如 simulation.distributed.DistributedBackend),
+                        需提供 run(cases, **run_kwargs) -> [(record, profiler), ...]
+        dedup:          按有效输入的内容哈希合并重复 case (simulation.dedup), 同一 Scanner 的多次扫描之间也复用;
+                        扫描中观察到无影响的参数 (dedup.inert_parameters) 会被记住,
+                        之后的扫描在相同的其余输入下不再为它的不同取值重复仿真
+        """
         self.results = []
+        self.workers = max(1, int(workers))
+        self.solver_options = solver_options
+        self.model_options = model_options
+        self.backend = backend
+        self.dedup = dedup
+        self._dedup_cache = {}
+        self._inert = {}  # 观察到无影响的参数 -> 其余输入的规范串集合 (见 dedup.inert_parameters)
+        self.profile = profile or trace_path is not None
+        self.trace_path = trace_path
+        self.scan_profiler = Profiler(trace=trace_path is not None) if self.profile else None
+
         # 自动加载 App 列表
         try:
+            t0 = time.perf_counter()
             with open("Cost.json", "r") as f:
                 self.available_apps = list(json.load(f)["profiles"].keys())
+            if self.profile:
+                self.scan_profiler.add_time("load_cost_json", time.perf_counter() - t0)
         except FileNotFoundError:
             self.available_apps = ["idle"]
             print("Warning: Cost.json not found, defaulting to ['idle']")
 
-    def run_external_scan(self, soh_levels=None, apps=None, duration=3600):
-        """
-        模式1: 外部工况扫描 (SOH x App)
-        """
+    # ==========================================
+    # 各扫描模式的 case 列表 (同步 Scanner 与 simulation.async_api 共用)
+    # ==========================================
+
+    def external_cases(self, soh_levels=None, apps=None, duration=3600):
+        """模式1: SOH x App"""
         # 设置默认值
         if soh_levels is None: soh_levels = [1.0, 0.95, 0.90, 0.85, 0.80]
         if apps is None: apps = self.available_apps
 
+        design = FullFactorial(Axis("soh", soh_levels), Axis("profile", apps))
+        return list(design.cases(scan_type="External", duration=duration))
+
+    def internal_cases(self, param_dict, fixed_soh=0.90, fixed_app="gaming_heavy", duration=7200):
+        """模式2: param_dict = { 'PARAM_NAME': [multiplier1, multiplier2, ...] }"""
+        # 倍率相对 config 中的基准值; 参数名不存在时 Axis 抛出 ValueError
+        axes = [Axis(name, multipliers, relative=True) for name, multipliers in param_dict.items()]
+
+        cases = []
+        for case in OneAtATime(*axes).cases(soh=fixed_soh, profile=fixed_app, duration=duration):
+            # 在结果中标记当前变化的参数
+            (param_name, mult), = case["extra_data"].items()
+            val = case["param_overrides"][param_name]
+            case["scan_type"] = f"Internal ({param_name} x{mult})"
+            case["extra_data"] = {"Param": param_name, "Multiplier": mult, "Value": val}
+            cases.append(case)
+        return cases
+
+    def matrix_cases(self, soh_levels=None, ambient_c=None, apps=None, duration=10800):
+        """模式3: SOH x 环境温度 (摄氏度) x App"""
+        if soh_levels is None: soh_levels = np.round(np.linspace(0.96, 0.80, 9), 3).tolist()
+        if ambient_c is None: ambient_c = [25, 30, 35, 40, 45]
+        if apps is None: apps = ["idle_baseline", "5g_gaming_heavy"]
+
+        design = FullFactorial(Axis("soh", soh_levels), Axis("ambient", ambient_c), Axis("profile", apps))
+        return list(design.cases(scan_type="Matrix", duration=duration))
+
+    def lifetime_cases(self, apps=None, soh_start=0.96, soh_eol=0.80, soh_step=0.02, duration=3600):
+        """模式4: 在 [soh_eol, soh_start] 区间按 soh_step 取点"""
+        if apps is None: apps = self.available_apps
+
+        n_levels = int(round((soh_start - soh_eol) / soh_step))
+        soh_levels = [round(soh_start - i * soh_step, 6) for i in range(n_levels)]
+
+        design = FullFactorial(Axis("profile", apps), Axis("soh", soh_levels))
+        return list(design.cases(scan_type="Lifetime (level)", duration=duration))
+
+    # ==========================================
+    # 同步扫描 (打印进度并写出结果文件)
+    # ==========================================
+
+    def run_external_scan(self, soh_levels=None, apps=None, duration=3600, output="scan_external_results.csv"):
+        """
+        模式1: 外部工况扫描 (SOH x App)
+        """
+        cases = self.external_cases(soh_levels, apps, duration)
+
         print(f"\n>>> Starting External Condition Scan (SOH x App)...")
-        print(f"SOH: {soh_levels}, Apps: {apps}")
-
-        for soh in soh_levels:
-            for app in apps:
-                self._run_single_case(
-                    soh=soh, 
-                    app_name=app, 
-                    duration=duration, 
-                    scan_type="External",
-                    param_overrides=None
-                )
+        print(f"SOH: {_axis(cases, 'soh')}, Apps: {_axis(cases, 'app_name')}")
+        self._run_cases(cases)
         
-        self._save_results("scan_external_results.csv")
+        return self._save_results(output, dims=("SOH_Start", "App"))
 
-    def run_internal_scan(self, param_dict, fixed_soh=0.90, fixed_app="gaming_heavy", duration=7200):
+    def run_internal_scan(self, param_dict, fixed_soh=0.90, fixed_app="gaming_heavy", duration=7200,
+                          output="scan_internal_results.csv"):
         """
         模式2: 内部参数敏感度扫描 (Parameter Sensitivity)
         param_dict: { 'PARAM_NAME': [multiplier1, multiplier2, ...] }
         """
         print(f"\n>>> Starting Internal Parameter Scan (Sensitivity)...")
-        
-        # 获取基准值 (从 config 获取)
-        base_values = {}
-        for k in param_dict.keys():
-            if hasattr(c, k):
-                base_values[k] = getattr(c, k)
-            else:
-                print(f"Warning: Parameter {k} not found in config.py")
-                base_values[k] = 0.0
-
-        for param_name, multipliers in param_dict.items():
-            base_val = base_values[param_name]
-            
-            for mult in multipliers:
-                val = base_val * mult
-                overrides = {param_name: val}
-                
-                # 在结果中标记当前变化的参数
-                tag = f"{param_name} x{mult}"
-                
-                self._run_single_case(
-                    soh=fixed_soh,
-                    app_name=fixed_app,
-                    duration=duration,
-                    scan_type=f"Internal ({tag})",
-                    param_overrides=overrides,
-                    extra_data={"Param": param_name, "Multiplier": mult, "Value": val}
-                )
-
-        self._save_results("scan_internal_results.csv")
-
-    def _run_single_case(self, soh, app_name, duration, scan_type, param_overrides=None, extra_data=None):
-        """内部通用执行逻辑"""
-        # 1. 初始化
-        y0, ext_init = get_initial_state_by_soh(target_soh=soh, soc_start=1.0)
-        
-        # 2. 运行模拟
-        loss_rate, avg_temp = run_single_static_test(
-            y0, ext_init, 
-            app_profile_name=app_name, 
-            duration=duration,
-            internal_params=param_overrides
-        )
-        
-        if loss_rate is None: return
-
-        # === 智能的寿命预测 ===
-        est_life_hours = np.inf
-        prediction_note = "Stable"
-
-        # 阈值：如果瞬时衰减太快（>1e-5），说明处于非线性剧烈变化区（如SOH 100%）
-        # 或者直接用 SOH 判断
-        if soh > 0.98:
-            est_life_hours = np.nan # 不预测，因为不准
-            prediction_note = "Transient (Formation)"
-        elif loss_rate > 1e-12:
-            # 线性外推: (0.2 即 20% 容量) / 速率
-            # 注意：这里假设从当前点匀速跑到 80%，比较保守
-            # 更精确的是：(当前SOH - 0.8) / loss_rate
-            remaining_capacity_to_lose = soh - 0.80
-            if remaining_capacity_to_lose > 0:
-                est_life_hours = remaining_capacity_to_lose / loss_rate
-            else:
-                est_life_hours = 0
-
-        # 3. 组装结果
-        record = {
-            "Type": scan_type,
-            "SOH_Start": soh,
-            "App": app_name,
-            "Avg_Temp_C": avg_temp,
-            "Aging_Rate_Hr": loss_rate,
-            "Est_Life_Hours": est_life_hours, ## 可能为 NaN
-            "Phase_Note": prediction_note #说明字段
+        self._run_cases(self.internal_cases(param_dict, fixed_soh, fixed_app, duration))
+
+        return self._save_results(output, dims=("Param", "Multiplier"))
+
+    def run_matrix_scan(self, soh_levels=None, ambient_c=None, apps=None, duration=10800,
+                        output="scan_matrix_results.csv"):
+        """
+        模式3: SOH x 环境温度 x App 矩阵扫描 (对应 experiments/exp_03)
+        ambient_c: 环境温度列表 (摄氏度)
+        """
+        cases = self.matrix_cases(soh_levels, ambient_c, apps, duration)
+
+        print(f"\n>>> Starting Matrix Scan (SOH x Ambient x App)...")
+        print(f"SOH: {_axis(cases, 'soh')}, Ambient(C): {_axis(cases, 'extra_data', 'Ambient_Temp')}, "
+              f"Apps: {_axis(cases, 'app_name')}")
+        for record in self._run_cases(cases):
+            finish_matrix_record(record)
+
+        return self._save_results(output, dims=("SOH_Start", "Ambient_Temp", "App"))
+
+    def run_lifetime_scan(self, apps=None, soh_start=0.96, soh_eol=0.80, soh_step=0.02, duration=3600,
+                          output="scan_lifetime_results.csv"):
+        """
+        模式4: 寿命扫描。在 [soh_eol, soh_start] 区间按 soh_step 取点测衰减速率,
+        再分段积分得到从 soh_start 衰减到 soh_eol 所需的小时数:
+            life = sum( (SOH_i - SOH_{i+1}) / rate_i )
+        """
+        cases = self.lifetime_cases(apps, soh_start, soh_eol, soh_step, duration)
+
+        print(f"\n>>> Starting Lifetime Scan ({soh_start:.2f} -> {soh_eol:.2f})...")
+        print(f"SOH grid: {_axis(cases, 'soh')}, Apps: {_axis(cases, 'app_name')}")
+        records = self._run_cases(cases)
+
+        for summary in lifetime_summaries(records, _axis(cases, 'app_name'), soh_start, soh_eol):
+            self.results.append(summary)
+            print(f"[Lifetime] App:{summary['App'][:15]:<15} | Life to {soh_eol:.2f}: "
+                  f"{summary['Est_Life_Hours']:,.0f} h")
+
+        return self._save_results(output, dims=("Type", "App", "SOH_Start"))
+
+    def run_design(self, design, soh=0.9, profile="gaming_5g", duration=3600, param_overrides=None,
+                   scan_type="Design", batch_size=1000, output="scan_design_results.csv"):
+        """
+        通用扫描: 按 simulation.design 中的扫描设计 (FullFactorial / Zip / LatinHypercube / Custom) 运行。
+        case 由设计惰性生成, 每 batch_size 个交给当前执行后端 (串行 / 进程池 / 分布式, 含去重),
+        不会一次性展开整个设计。未被轴覆盖的维度取 soh / profile / duration / param_overrides。
+        结果中每个轴对应一列 (design.dims); 网格设计写 .store 时各轴即维度,
+        其他设计按 Case 序号组织。
+        """
+        try:
+            total = len(design)
+        except TypeError:
+            total = None
+        print(f"\n>>> Starting {type(design).__name__} Scan ({' x '.join(a.name for a in design.axes)}, "
+              f"{total if total is not None else '?'} cases)...")
+
+        cases = design.cases(scan_type=scan_type, soh=soh, profile=profile, duration=duration,
+                             param_overrides=param_overrides)
+        if not design.grid:
+            cases = _numbered(cases)
+        for batch in batched(cases, max(1, int(batch_size))):
+            self._run_cases(batch)
+
+        return self._save_results(output, dims=design.dims if design.grid else ("Case",))
+
+    def _run_cases(self, cases):
+        """
+        执行一组 case。workers > 1 时分发到进程池 (结果顺序与输入一致)。
+        每个 case 是传给 run_case 的关键字参数字典。
+        开启 dedup 时只执行有效输入互不相同且尚未算过的 case, 其余直接复用结果。
+        """
+        kwargs = {
+            "solver_options": self.solver_options,
+            "model_options": self.model_options,
+            "profile": self.profile,
+            "trace": self.profile and self.scan_profiler.trace,
+            "backend": self._backend_label(),
         }
-        
-        # 合并额外的参数信息（如果是内部扫描）
-        if extra_data:
-            record.update(extra_data)
-            
-        self.results.append(record)
-        print(f"[{scan_type[:15]:<15}] SOH:{soh:.2f} | App:{app_name[:10]:<10} | T:{avg_temp:.1f}C | Rate:{loss_rate:.2e}")
-
-    def _save_results(self, filename):
+        if not self.dedup:
+            return self._collect(self._execute(cases, kwargs))
+
+        from simulation import dedup
+        keys = [dedup.input_hash(case, kwargs, self._inert) for case in cases]
+        pending = {}
+        for key, case in zip(keys, cases):
+            if key not in self._dedup_cache and key not in pending:
+                pending[key] = case
+        for key, (record, prof) in zip(pending, self._execute(list(pending.values()), kwargs)):
+            self._dedup_cache[key] = record
+            if prof is not None:
+                self.scan_profiler.merge(prof)
+
+        records = [self._dedup_cache[key] for key in keys]
+        outputs = [(dedup.relabel(r, case, key) if r is not None else None, None)
+                   for r, case, key in zip(records, cases, keys)]
+        self._report_dedup(cases, records, kwargs, len(pending))
+        return self._collect(outputs)
+
+    def _execute(self, cases, kwargs):
+        if self.backend is not None:
+            # 后端逐 case 独立执行, 续算模式下也全部冷启动
+            return self.backend.run(cases, **kwargs)
+        if (self.solver_options or {}).get("continuation") and not self.solver_options.get("quasi_static"):
+            return self._execute_chains(cases, kwargs)
+
+        if self.workers > 1 and len(cases) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(run_case, **case, **kwargs) for case in cases]
+                return [f.result() for f in futures]
+        return (run_case(**case, **kwargs) for case in cases)
+
+    def _execute_chains(self, cases, kwargs):
+        """续算模式: 按 simulation.continuation.chains 分链, 链内顺序执行, 多条链可并行"""
+        from simulation import continuation
+        if not self.solver_options.get("stop_rtol"):
+            print("[Continuation] Note: without stop_rtol every case still integrates the full duration; "
+                  "warm starts only save time together with early stopping (--stop-rtol)")
+        chains = continuation.chains(cases, kwargs, max_length=self.solver_options.get("chain_length", 16))
+        batches = [[cases[i] for i in chain] for chain in chains]
+        if self.workers > 1 and len(chains) > 1:
+            from concurrent.futures import ProcessPoolExecutor
+            with ProcessPoolExecutor(max_workers=self.workers) as pool:
+                futures = [pool.submit(continuation.run_chain, batch, kwargs) for batch in batches]
+                results = [f.result() for f in futures]
+        else:
+            results = [continuation.run_chain(batch, kwargs) for batch in batches]
+
+        outputs = [None] * len(cases)
+        for chain, outs in zip(chains, results):
+            for i, out in zip(chain, outs):
+                outputs[i] = out
+        return outputs
+
+    def _report_dedup(self, cases, records, kwargs, n_run):
+        from simulation import dedup
+        if n_run < len(cases):
+            print(f"[Dedup] {len(cases)} cases -> {n_run} simulations ({len(cases) - n_run} reused)")
+        for apps in dedup.duplicate_profiles(cases):
+            print(f"[Dedup] identical profiles: {' == '.join(apps)}")
+        unread = dedup.unread_overrides(cases, self.model_options)
+        if unread:
+            print(f"[Dedup] inert parameters (not read by the model): {', '.join(unread)}")
+        observed = dedup.inert_parameters(cases, records, kwargs, self._inert)
+        for name, contexts in observed.items():
+            self._inert.setdefault(name, set()).update(contexts)
+        no_effect = [k for k in observed if k not in unread]
+        if no_effect:
+            print(f"[Dedup] inert parameters (no effect on outputs in this scan, reused by later scans): "
+                  f"{', '.join(no_effect)}")
+
+    def _backend_label(self):
+        """结果出处中的执行方式"""
+        if self.backend is not None:
+            return getattr(self.backend, "name", type(self.backend).__name__)
+        return f"process-pool({self.workers})" if self.workers > 1 else "serial"
+
+    def _collect(self, outputs):
+        records = []
+        for record, prof in outputs:
+            if record is None: continue
+            if prof is not None:
+                self.scan_profiler.merge(prof)
+            self.results.append(record)
+            records.append(record)
+            print(f"[{record['Type'][:15]:<15}] SOH:{record['SOH_Start']:.2f} | App:{record['App'][:10]:<10} "
+                  f"| T:{record['Avg_Temp_C']:.1f}C | Rate:{record['Aging_Rate_Hr']:.2e}")
+        return records
+
+    def _save_results(self, filename, dims=None):
+        """
+        保存并返回本次扫描的结果记录列表。
+        文件名以 .store 结尾时写成按 dims 组织的内存映射结果库 (simulation.result_store), 否则写 CSV。
+        """
         if not self.results:
             print("No results to save.")
-            return
-            
-        df = pd.DataFrame(self.results)
+            return []
+
+        t0 = time.perf_counter()
+        records = self.results
         # 将本次结果保存，随后清空缓存以便下一次扫描
-        df.to_csv(filename, index=False)
+        out_dir = os.path.dirname(filename.rstrip("/"))
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+        if filename.rstrip("/").endswith(".store"):
+            from simulation.result_store import ResultStore
+            ResultStore.from_records(filename, records, dims)
+        else:
+            # pandas 只在真正写结果时才导入, 避免拖慢 CLI / 子进程启动
+            import pandas as pd
+            pd.DataFrame(records).to_csv(filename, index=False)
         self.results = [] # Reset
-        print(f"Saved results to {filename}")
\ No newline at end of file
+        print(f"Saved results to {filename}")
+
+        if self.profile:
+            self._report_profile(filename, time.perf_counter() - t0)
+        return records
+
+    def _report_profile(self, filename, save_seconds):
+        """输出整次扫描的聚合统计, 并重置扫描级 profiler"""
+        prof = self.scan_profiler
+        prof.add_time("save_results", save_seconds)
+        summary = prof.summary()
+        print(f"[Profile] cases={summary.get('n_cases', 0)} "
+              f"deriv_evals={summary.get('n_derivative_evals', 0)} "
+              f"rejected={summary.get('n_rejected_steps', 0)} "
+              f"wall={summary.get('t_case_s', 0.0):.2f}s "
+              f"(derivatives {summary.get('t_derivatives_s', 0.0):.2f}s, "
+              f"calculate_state {summary.get('t_calculate_state_s', 0.0):.2f}s, "
+              f"save {save_seconds:.3f}s)")
+        prof.log_summary(f"scan -> {filename}")
+
+        if self.trace_path:
+            prof.write_chrome_trace(self.trace_path)
+            print(f"Saved trace to {self.trace_path}")
+
+        self.scan_profiler = Profiler(trace=prof.trace)
+
+
+def _axis(cases, key, sub=None):
+    """case 列表中某个字段的取值 (按首次出现顺序去重), 用于打印扫描范围"""
+    return list(dict.fromkeys(case[key][sub] if sub else case[key] for case in cases))
+
+
+def _numbered(cases):
+    """非网格设计: 给每个 case 加上序号标签 Case"""
+    for i, case in enumerate(cases):
+        case["extra_data"] = dict(case.get("extra_data") or {}, Case=i)
+        yield case
+
+
+def finish_matrix_record(record):
+    """矩阵扫描的派生列"""
+    record["Temp_Rise"] = record["Avg_Temp_C"] - record["Ambient_Temp"]
+    return record
+
+
+def lifetime_summaries(records, apps, soh_start, soh_eol):
+    """寿命扫描: 按 App 分段积分 (每段用该段起点的速率), 返回汇总记录列表"""
+    summaries = []
+    for app in apps:
+        levels = sorted((r for r in records if r["App"] == app), key=lambda r: -r["SOH_Start"])
+        if not levels: continue
+        life = 0.0
+        for i, r in enumerate(levels):
+            next_soh = levels[i + 1]["SOH_Start"] if i + 1 < len(levels) else soh_eol
+            rate = r["Aging_Rate_Hr"]
+            life += (r["SOH_Start"] - next_soh) / rate if rate > 1e-12 else np.inf
+
+        summaries.append({
+            "Type": "Lifetime",
+            "SOH_Start": soh_start,
+            "App": app,
+            "Avg_Temp_C": float(np.mean([r["Avg_Temp_C"] for r in levels])),
+            "Aging_Rate_Hr": (soh_start - soh_eol) / life if life > 0 else np.nan,
+            "Est_Life_Hours": life,
+            "Phase_Note": f"Integrated to SOH {soh_eol:.2f}",
+            **provenance.summary_fields(levels),
+        })
+    return summaries
+
+
+def run_case(soh, app_name, duration, scan_type, param_overrides=None, extra_data=None,
+             solver_options=None, model_options=None, profile=False, trace=False,
+             warm_start=None, warm_correction=None, report=None, backend="serial"):
+    """
+    执行单个扫描 case 并组装结果记录 (模块级函数, 可在子进程中运行)。
+    返回 (record, profiler); profile 关闭时 profiler 为 None, 仿真失败时 record 为 None。
+    warm_start / report: 续算模式用 (见 simulation.continuation), 直接传给 run_single_static_test
+    warm_correction: 续算模式下补回升温段的修正量 (continuation.warm_correction), 从速率和平均温度中扣除
+    backend: 执行方式, 与代码版本等一起作为出处信息写入记录 (simulation.provenance)
+    """
+    prof = Profiler(trace=trace) if profile else None
+    t_case = time.perf_counter()
+
+    # 1. 初始化
+    y0, ext_init = get_initial_state_by_soh(target_soh=soh, soc_start=1.0)
+    t_amb = (param_overrides or {}).get("T_AMB")
+    if t_amb is not None:
+        y0[2] = t_amb # 电池初始温度与环境温度同步
+
+    # 2. 运行模拟 (solver_options["quasi_static"] 时从稳态出发自适应积分, 另加升温段修正)
+    quasi_static = bool((solver_options or {}).get("quasi_static"))
+    qs_report = {}
+    sim_report = report if report is not None else {}
+    if quasi_static:
+        from simulation.quasi_static import run_quasi_static_test
+        loss_rate, avg_temp = run_quasi_static_test(
+            y0, ext_init,
+            app_profile_name=app_name,
+            duration=duration,
+            internal_params=param_overrides,
+            profiler=prof,
+            solver_options=solver_options,
+            model_options=model_options,
+            report=qs_report
+        )
+    else:
+        loss_rate, avg_temp = run_single_static_test(
+            y0, ext_init, 
+            app_profile_name=app_name, 
+            duration=duration,
+            internal_params=param_overrides,
+            profiler=prof,
+            solver_options=solver_options,
+            model_options=model_options,
+            warm_start=warm_start,
+            report=sim_report
+        )
+    
+    if loss_rate is None: return None, prof
+    if warm_correction is not None:
+        loss_rate -= warm_correction["rate"]
+        avg_temp -= warm_correction["temp"]
+
+    # === 智能的寿命预测 ===
+    est_life_hours = np.inf
+    prediction_note = "Stable"
+
+    # 阈值：如果瞬时衰减太快（>1e-5），说明处于非线性剧烈变化区（如SOH 100%）
+    # 或者直接用 SOH 判断
+    if soh > 0.98:
+        est_life_hours = np.nan # 不预测，因为不准
+        prediction_note = "Transient (Formation)"
+    elif loss_rate > 1e-12:
+        # 线性外推: (0.2 即 20% 容量) / 速率
+        # 注意：这里假设从当前点匀速跑到 80%，比较保守
+        # 更精确的是：(当前SOH - 0.8) / loss_rate
+        remaining_capacity_to_lose = soh - 0.80
+        if remaining_capacity_to_lose > 0:
+            est_life_hours = remaining_capacity_to_lose / loss_rate
+        else:
+            est_life_hours = 0
+
+    # 3. 组装结果
+    record = {
+        "Type": scan_type,
+        "SOH_Start": soh,
+        "App": app_name,
+        "Avg_Temp_C": avg_temp,
+        "Aging_Rate_Hr": loss_rate,
+        "Est_Life_Hours": est_life_hours, ## 可能为 NaN
+        "Phase_Note": prediction_note #说明字段
+    }
+    
+    if quasi_static:
+        # 未通过校验 / 不支持时已退回完整瞬态仿真
+        record["Quasi_Static"] = "fallback" not in qs_report
+    elif (solver_options or {}).get("continuation"):
+        # 由相邻 case 的终态续算 (升温段按 warm_correction 补回); False 为冷启动
+        # Warm_Rel_Err: 升温段修正的相对误差估计 (冷启动为 0)
+        record["Warm_Start"] = warm_start is not None
+        record["Warm_Rel_Err"] = (warm_correction["error"] / abs(loss_rate)
+                                  if warm_correction is not None and loss_rate else 0.0)
+    if "converged" in sim_report:
+        # 收敛提前停止: 实际积分时长, 达到的速率相对偏差和最后窗口的温度变化 (K)
+        # (越小越可信; 未收敛时跑满 duration, 二者中超出 stop_rtol / stop_temp_tol 的即未满足的判据)
+        record["Converged"] = sim_report["converged"]
+        record["Stop_Time_s"] = sim_report["stop_time"]
+        record["Rate_Rel_Dev"] = sim_report["rate_rel_dev"]
+        record["Temp_Drift_K"] = sim_report["temp_drift"]
+
+    # 合并额外的参数信息（如果是内部扫描）
+    if extra_data:
+        record.update(extra_data)
+
+    # 出处信息在实际计算的进程中记录 (代码版本, Cost.json, 参数, 求解器, 执行方式)
+    provenance.stamp(record, {"param_overrides": param_overrides, "duration": duration},
+                     solver_options, model_options, backend)
+
+    if prof is not None:
+        prof.record("case", t_case, scan_type=scan_type, soh=soh, app=app_name)
+        prof.count("cases")
+        record.update({f"prof_{k}": v for k, v in prof.summary().items()})
+        prof.log_summary(f"{scan_type} | SOH {soh} | {app_name}")
+
+    return record, prof
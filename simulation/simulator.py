@@ -1,23 +1,49 @@
+import time
 import numpy as np
 import config as c
 
-from models.power_model import SimulationPlan
-from models.battery_model import BatterySystem
-from solver import RK4Solver
+from models.power_model import load_plan
+from models import make_system
+from solver import make_solver
+from simulation.profiling import InstrumentedSystem, InstrumentedDevice
 
-def run_single_static_test(y0, ext_state, app_profile_name, duration=3600, internal_params=None):
+def run_single_static_test(y0, ext_state, app_profile_name, duration=3600, internal_params=None, profiler=None,
+                           solver_options=None, model_options=None, trajectory=None, warm_start=None, report=None):
     """
     运行单次静态负载测试。
     输入: 物理初值 y0, 外部状态 ext_state, App名称, 持续时间
+          profiler: 可选的 simulation.profiling.Profiler, 为 None 时不做任何插桩
+          solver_options: {"name": "rk4"|"rk45"|"bdf", "dt": 步长(自适应时为最大步长), "rtol", "atol"}
+                          可选 "stop_rtol" (以及 "stop_window", "stop_temp_tol"): 衰减速率和温度收敛后提前停止,
+                          剩余时长外推 (见 simulation.convergence.ConvergenceMonitor)
+          model_options: {"name": "lumped"|"spme"|"pack", ...}; y0 始终是集总模型的 7 维初值
+          trajectory: 可选的 simulation.trajectory.Trajectory, 记录稠密输出供事后按任意时间查询
+                      (固定步长求解器按 Trajectory.interval 合并)
+          warm_start: 可选的快变量初值 (对应 system.IDX_FAST: 温度, 动态浓差), 覆盖 y0 中的对应分量
+          report: 可选的字典, 结束时写入快变量终值 fast_state (供相邻 case 续算);
+                  开启提前停止时还写入 converged, stop_time, rate_rel_dev, temp_drift
     输出: (SOH衰减速率/小时, 平均温度)
     """
     # 1. 初始化系统
-    system = BatterySystem(param_overrides=internal_params)
-    solver = RK4Solver(0.0, y0)
+    system = make_system(internal_params, **(model_options or {}))
+    if hasattr(system, "initial_state"):
+        y0 = system.initial_state(y0)
+    idx_fast = getattr(system, "IDX_FAST", None)
+    if warm_start is not None:
+        y0 = np.array(y0, dtype=float)
+        y0[idx_fast] = warm_start
+    opts = dict(solver_options or {})
+    if opts.get("atol") is None:
+        opts["atol"] = system.ATOL
+    solver = make_solver(0.0, y0, **opts)
     
     # 2. 获取负载配置
     try:
-        plan = SimulationPlan("Cost.json")
+        if profiler is not None:
+            with profiler.phase("load_cost_json"):
+                plan = load_plan("Cost.json")
+        else:
+            plan = load_plan("Cost.json")
         if app_profile_name not in plan.profiles:
             print(f"Warning: Profile '{app_profile_name}' not found.")
             return None, None
@@ -26,13 +52,30 @@ def run_single_static_test(y0, ext_state, app_profile_name, duration=3600, inter
         print("Error: Cost.json not found.")
         return None, None
 
+    if trajectory is not None:
+        trajectory.start(system, solver.t, solver.state, adaptive=solver.adaptive)
+
+    # 插桩仅在开启 profiler 时生效, 关闭时 solver 直接调用原对象
+    if profiler is not None:
+        system = InstrumentedSystem(system, profiler)
+        device_state = InstrumentedDevice(device_state, profiler)
+        t_loop = time.perf_counter()
+
     # 3. 数据收集
     temps = []
+    weights = []
     soh_start = ext_state.SOH
     
     # 4. 积分循环
-    dt = 1.0
+    dt = opts.get("dt", 1.0)
     current_time = 0.0
+    n_steps = 0
+    monitor = None
+    if opts.get("stop_rtol"):
+        from simulation.convergence import ConvergenceMonitor
+        monitor = ConvergenceMonitor(duration, rtol=opts["stop_rtol"], window=opts.get("stop_window", 600.0),
+                                     temp_tol=opts.get("stop_temp_tol", 0.01))
+        monitor.start(current_time, soh_start, system.temperature(solver.state))
     
     while current_time < duration:
         # 计算功率
@@ -46,20 +89,55 @@ def run_single_static_test(y0, ext_state, app_profile_name, duration=3600, inter
         if ext_state.V > 0.1:
             ext_state.I = ext_state.P / ext_state.V
             
-        # 步进
-        ext_state = solver.step(system, dt, ext_state)
-        current_time += dt
+        # 步进 (自适应求解器以 dt 为最大步长, 并且不越过 duration)
+        h = min(dt, duration - current_time) if solver.adaptive else dt
+        T_prev = system.temperature(solver.state)
+        ext_in = ext_state
+        ext_state = solver.step(system, h, ext_state)
+        if trajectory is not None:
+            trajectory.append(solver.dense_output(), ext_in)
+        weights.append(solver.t - current_time)
+        current_time = solver.t
+        n_steps += 1
         
-        # 记录温度 (K)
-        temps.append(solver.state[2])
+        # 记录温度 (K), 按实际步长加权 (大步长时取梯形平均)
+        T_now = system.temperature(solver.state)
+        temps.append(0.5 * (T_prev + T_now) if solver.adaptive else T_now)
         
         # 低压保护
         if ext_state.V < 2.5:
+            if profiler is not None:
+                profiler.count("events/low_voltage")
+            break
+
+        # 收敛提前停止
+        if monitor is not None and monitor.update(current_time, ext_state.SOH, T_now):
+            if profiler is not None:
+                profiler.count("events/converged")
             break
+
+    if profiler is not None:
+        profiler.record("integration", t_loop, profile=app_profile_name, steps=n_steps)
+        profiler.count("steps", n_steps)
+        profiler.count("rejected_steps", getattr(solver, "n_rejected", 0))
             
+    if report is not None and idx_fast is not None:
+        report["fast_state"] = np.array(solver.state, dtype=float)[idx_fast]
+
     # 5. 计算指标
     soh_end = ext_state.SOH
-    avg_temp_c = np.mean(temps) - 273.15
+    if monitor is not None:
+        if report is not None:
+            report.update(converged=monitor.converged, stop_time=current_time, rate_rel_dev=monitor.rel_dev,
+                          temp_drift=monitor.temp_drift)
+        if monitor.converged:
+            # 剩余时长按收敛后的速率趋势和温度外推, 结果与跑满 duration 可比
+            loss_tail, remaining, T_tail = monitor.extrapolate()
+            soh_end -= loss_tail
+            temps.append(T_tail)
+            weights.append(remaining)
+            current_time += remaining
+    avg_temp_c = np.average(temps, weights=weights) - 273.15
     
     actual_hours = current_time / 3600.0
     loss_rate = (soh_start - soh_end) / actual_hours if actual_hours > 0 else 0.0
@@ -0,0 +1,172 @@
+import numpy as np
+
+from solver import DenseSegment
+
+
+class HermiteSegment:
+    """
+    多个固定步长合并成的三次 Hermite 插值段: 端点状态和斜率取自首末两步的稠密输出,
+    调用方式与 DenseSegment 相同。
+    """
+
+    def __init__(self, t_old, t, y_old, y, f_old, f):
+        self.t_old = t_old
+        self.t = t
+        self.y_old = y_old
+        self.y = y
+        self.f_old = f_old
+        self.f = f
+
+    def __call__(self, t):
+        h = self.t - self.t_old
+        s = np.atleast_1d((np.asarray(t, dtype=float) - self.t_old) / h)
+        h00 = (1 + 2 * s) * (1 - s) ** 2
+        h10 = s * (1 - s) ** 2
+        h01 = s ** 2 * (3 - 2 * s)
+        h11 = s ** 2 * (s - 1)
+        y = (np.outer(self.y_old, h00) + h * np.outer(self.f_old, h10)
+             + np.outer(self.y, h01) + h * np.outer(self.f, h11))
+        return y[:, 0] if np.ndim(t) == 0 else y
+
+
+def _end_point(segment):
+    """DenseSegment 末端的状态和斜率 dy/dt"""
+    n = np.arange(1, segment.Q.shape[1] + 1)
+    h = segment.t - segment.t_old
+    return segment.y_old + h * segment.Q.sum(axis=1), segment.Q @ n
+
+
+class Trajectory:
+    """
+    由求解器稠密输出拼接成的连续轨迹, 可在积分结束后按任意时间查询。
+
+    自适应求解器每个已接受步保存一个插值段 (solver.dense_output()) 和该步使用的外部状态,
+    因此可以保持大步长, 之后仍能得到细粒度的曲线 / 报表, 无需重新运行。
+    固定步长求解器 (RK4, dt = 1 s) 的步数很多: 每 interval 秒的步点拟合成一个三次 Hermite 段
+    (HermiteSegment, 外部状态取段内第一步的), 任一步点上的偏差超过 rtol * |y| + system.ATOL 时
+    对半切开 (例如起始的快速暂态), 存储量与积分步数无关。interval=None 时逐步保存。
+
+    用法:
+        traj = Trajectory()
+        run_single_static_test(y0, ext, "gaming_5g", trajectory=traj)
+        traj.temperature(np.arange(0, 3600, 600))   # K
+        traj.soh([600, 1200])
+    """
+
+    def __init__(self, interval=60.0, rtol=1e-4):
+        self.interval = interval
+        self.rtol = rtol
+        self.merge = False
+        self.system = None
+        self.n_states = 0
+        self.t_breaks = []
+        self.segments = []
+        self.inputs = []
+        self._open = []
+
+    # --- 记录 (由 simulator 调用) ---
+    def start(self, system, t0, y0, adaptive=True):
+        """adaptive: 求解器是否自适应步长; 固定步长时按 interval 合并"""
+        self.merge = not adaptive and self.interval is not None
+        self.atol = np.broadcast_to(np.asarray(getattr(system, "ATOL", 0.0), dtype=float), (len(y0),))
+        self.system = system
+        self.n_states = len(y0)
+        self.t_breaks = [t0]
+        self.segments = []
+        self.inputs = []
+        self._open = []  # 尚未合并的步点 (t, y, dy/dt, 从该点出发的一步所用的外部状态)
+
+    def append(self, segment, ext):
+        """追加一个插值段; ext 是该步积分时保持不变的外部状态"""
+        if self.merge and isinstance(segment, DenseSegment):
+            if not self._open:
+                self._open = [(segment.t_old, segment.y_old, segment.Q[:, 0], ext)]
+            else:
+                self._open[-1] = self._open[-1][:3] + (ext,)
+            self._open.append((segment.t, *_end_point(segment), None))
+            if segment.t - self._open[0][0] >= self.interval:
+                self._flush()
+            return
+        self.t_breaks.append(segment.t)
+        self.segments.append(segment)
+        self.inputs.append(ext)
+
+    def _flush(self):
+        """把积累的步点合并成 Hermite 段"""
+        if len(self._open) < 2:
+            return
+        t = np.array([k[0] for k in self._open])
+        Y = np.column_stack([k[1] for k in self._open])
+        F = np.column_stack([k[2] for k in self._open])
+        inputs = [k[3] for k in self._open]
+        self._open = []
+        self._fit(t, Y, F, inputs, 0, len(t) - 1)
+
+    def _fit(self, t, Y, F, inputs, i, j):
+        """用一个 Hermite 段覆盖步点 i..j; 中间步点的偏差超限时对半切开"""
+        # 复制列: 视图会让整块步点矩阵一直留在内存中
+        seg = HermiteSegment(t[i], t[j], Y[:, i].copy(), Y[:, j].copy(), F[:, i].copy(), F[:, j].copy())
+        if j - i > 1:
+            inner = Y[:, i + 1:j]
+            if np.any(np.abs(seg(t[i + 1:j]) - inner) > self.rtol * np.abs(inner) + self.atol[:, None]):
+                m = (i + j) // 2
+                self._fit(t, Y, F, inputs, i, m)
+                self._fit(t, Y, F, inputs, m, j)
+                return
+        self.t_breaks.append(t[j])
+        self.segments.append(seg)
+        self.inputs.append(inputs[i])
+
+    # --- 查询 ---
+    @property
+    def t_start(self):
+        return self.t_breaks[0]
+
+    @property
+    def t_end(self):
+        self._flush()
+        return self.t_breaks[-1]
+
+    def __len__(self):
+        self._flush()
+        return len(self.segments)
+
+    def _locate(self, t):
+        self._flush()
+        t = np.atleast_1d(np.asarray(t, dtype=float))
+        if len(self.segments) == 0:
+            raise ValueError("Trajectory is empty")
+        if np.any(t < self.t_start) or np.any(t > self.t_end):
+            raise ValueError(f"Query time outside trajectory range [{self.t_start}, {self.t_end}]")
+        idx = np.searchsorted(self.t_breaks, t, side="left") - 1
+        return t, np.clip(idx, 0, len(self.segments) - 1)
+
+    def __call__(self, t):
+        """状态向量; 标量 t 返回 (n_states,), 数组 t 返回 (n_states, len(t))"""
+        ts, idx = self._locate(t)
+        y = np.empty((self.n_states, ts.size))
+        # 按插值段分组计算, 同一步内的查询一次完成
+        for i in np.unique(idx):
+            mask = idx == i
+            y[:, mask] = self.segments[i](ts[mask])
+        return y[:, 0] if np.ndim(t) == 0 else y
+
+    def temperature(self, t):
+        """电池温度 (K)"""
+        y = self(t)
+        if np.ndim(t) == 0:
+            return self.system.temperature(y)
+        return np.array([self.system.temperature(y[:, j]) for j in range(y.shape[1])])
+
+    def external(self, t):
+        """由插值状态重新计算的代数状态 (ExternalState: SOH / SOC / V / Phi_Anode ...)"""
+        ts, idx = self._locate(t)
+        y = self(ts)
+        out = [self.system.calculate_state(ts[j], y[:, j], self.inputs[idx[j]]) for j in range(ts.size)]
+        return out[0] if np.ndim(t) == 0 else out
+
+    def soh(self, t):
+        ext = self.external(t)
+        if np.ndim(t) == 0:
+            return ext.SOH
+        return np.array([e.SOH for e in ext])
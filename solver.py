@@ -1,9 +1,41 @@
 import numpy as np
 
+
+class DenseSegment:
+    """
+    单个已接受步的连续插值: y(t_old + theta*h) = y_old + h * Q @ [theta, theta^2, ...]
+    Q 的每一列对应 theta 的一个幂次, 由各阶段斜率与求解器的稠密输出系数矩阵相乘得到。
+    """
+
+    def __init__(self, t_old, t, y_old, Q):
+        self.t_old = t_old
+        self.t = t
+        self.y_old = y_old
+        self.Q = Q
+
+    def __call__(self, t):
+        h = self.t - self.t_old
+        theta = np.atleast_1d((np.asarray(t, dtype=float) - self.t_old) / h)
+        powers = theta ** np.arange(1, self.Q.shape[1] + 1)[:, None]
+        y = self.y_old[:, None] + h * (self.Q @ powers)
+        return y[:, 0] if np.ndim(t) == 0 else y
+
+
 class RK4Solver:
+    adaptive = False
+
+    # 经典 RK4 的 3 阶连续扩展 b_i(theta), 行: k1..k4, 列: theta, theta^2, theta^3
+    P = np.array([
+        [1.0, -1.5, 2/3],
+        [0.0, 1.0, -2/3],
+        [0.0, 1.0, -2/3],
+        [0.0, -0.5, 2/3],
+    ])
+
     def __init__(self, t0, y0):
         self.t = t0
         self.state = np.array(y0, dtype=float)
+        self._last = None
 
     def step(self, system, dt, input_ext):
         """
@@ -23,7 +55,171 @@ class RK4Solver:
         
         self.state = y + delta
         self.t += dt
+        self._last = (t, y, (k1, k2, k3, k4))
         
         # 积分后更新物理系统的代数状态
         # 注意：Rust中是 update in-place，这里返回新的 external state
-        return system.calculate_state(self.t, self.state, input_ext)
\ No newline at end of file
+        return system.calculate_state(self.t, self.state, input_ext)
+
+    def dense_output(self):
+        """上一步的连续插值 (DenseSegment)"""
+        t_old, y, k = self._last
+        return DenseSegment(t_old, self.t, y, np.array(k).T @ self.P)
+
+class RK45Solver:
+    """
+    Dormand-Prince 5(4) 自适应步长求解器。
+    step() 的 dt 参数作为最大步长: 求解器自行决定实际步长 (可能小于 dt),
+    调用方通过 self.t 获取实际推进到的时间。
+    """
+    adaptive = True
+
+    # Butcher 表
+    C = np.array([0.0, 1/5, 3/10, 4/5, 8/9, 1.0, 1.0])
+    A = [
+        [],
+        [1/5],
+        [3/40, 9/40],
+        [44/45, -56/15, 32/9],
+        [19372/6561, -25360/2187, 64448/6561, -212/729],
+        [9017/3168, -355/33, 46732/5247, 49/176, -5103/18656],
+        [35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84],
+    ]
+    B = np.array([35/384, 0.0, 500/1113, 125/192, -2187/6784, 11/84, 0.0])
+    E = np.array([71/57600, 0.0, -71/16695, 71/1920, -17253/339200, 22/525, -1/40])
+    # 4 阶稠密输出系数 (Dormand & Prince / Shampine), 行: k1..k7, 列: theta..theta^4
+    P = np.array([
+        [1, -8048581381/2820520608, 8663915743/2820520608, -12715105075/11282082432],
+        [0, 0, 0, 0],
+        [0, 131558114200/32700410799, -68118460800/10900136933, 87487479700/32700410799],
+        [0, -1754552775/470086768, 14199869525/1410260304, -10690763975/1880347072],
+        [0, 127303824393/49829197408, -318862633887/49829197408, 701980252875/199316789632],
+        [0, -282668133/205662961, 2019193451/616988883, -1453857185/822651844],
+        [0, 40617522/29380423, -110615467/29380423, 69997945/29380423],
+    ])
+
+    def __init__(self, t0, y0, rtol=1e-6, atol=1e-9, first_step=1.0):
+        self.t = t0
+        self.state = np.array(y0, dtype=float)
+        self.rtol = rtol
+        self.atol = np.asarray(atol, dtype=float)
+        self.h = first_step
+        self.n_rejected = 0
+        self._last = None
+
+    def _stages(self, system, t, y, h, input_ext):
+        k = np.empty((7, y.size))
+        k[0] = system.derivatives(t, y, input_ext)
+        for i in range(1, 7):
+            dy = np.dot(self.A[i], k[:i])
+            k[i] = system.derivatives(t + self.C[i]*h, y + h*dy, input_ext)
+        return k
+
+    def step(self, system, dt, input_ext):
+        y = self.state
+        t = self.t
+        h = min(self.h, dt)
+
+        while True:
+            k = self._stages(system, t, y, h, input_ext)
+            y_new = y + h * np.dot(self.B, k)
+            err = h * np.dot(self.E, k)
+
+            scale = self.atol + self.rtol * np.maximum(np.abs(y), np.abs(y_new))
+            err_norm = np.sqrt(np.mean((err / scale)**2))
+            if not np.isfinite(err_norm):
+                raise RuntimeError(f"RK45 step failed at t={t:.3f}: non-finite derivatives or error estimate")
+
+            if err_norm <= 1.0:
+                # 接受: 按 5 阶误差估计放大下一步 (最多 5 倍)
+                factor = 5.0 if err_norm == 0 else min(5.0, 0.9 * err_norm**-0.2)
+                self.h = max(h * factor, 1e-6)
+                break
+
+            # 拒绝: 缩小步长重试
+            self.n_rejected += 1
+            h = h * max(0.2, 0.9 * err_norm**-0.2)
+            if h < 1e-12 * max(1.0, abs(t)):
+                raise RuntimeError(f"RK45 step failed at t={t:.3f}: step size {h:.3e} below minimum")
+
+        self.state = y_new
+        self.t = t + h
+        self._last = (t, y, k)
+        return system.calculate_state(self.t, self.state, input_ext)
+
+    def dense_output(self):
+        """上一步的连续插值 (DenseSegment); 第 7 阶段即新点处的斜率 (FSAL)"""
+        t_old, y, k = self._last
+        return DenseSegment(t_old, self.t, y, k.T @ self.P)
+
+
+class BDFSolver:
+    """
+    隐式变阶 BDF 求解器 (scipy.integrate.BDF), 用于刚性系统 (例如空间分辨 SPMe)。
+    若 system 提供 jac_sparsity(), Jacobian 按稀疏结构做分组有限差分。
+    与 RK45Solver 一样, step() 的 dt 是最大步长, 积分器历史在多次 step 之间保留。
+    """
+    adaptive = True
+
+    def __init__(self, t0, y0, rtol=1e-6, atol=1e-9):
+        self.t = t0
+        self.state = np.array(y0, dtype=float)
+        self.rtol = rtol
+        self.atol = atol
+        self._bdf = None
+        self._ext = None
+
+    def _build(self, system, dt):
+        try:
+            from scipy.integrate import BDF
+        except ImportError as e:
+            raise ImportError("BDFSolver requires scipy (pip install scipy)") from e
+
+        sparsity = system.jac_sparsity() if hasattr(system, "jac_sparsity") else None
+        # 外部状态在一步之内保持不变, 通过 self._ext 传入
+        fun = lambda t, y: system.derivatives(t, y, self._ext)
+        self._bdf = BDF(fun, self.t, self.state, t_bound=np.inf, max_step=dt,
+                        rtol=self.rtol, atol=self.atol, jac_sparsity=sparsity)
+
+    def step(self, system, dt, input_ext):
+        self._ext = input_ext
+        if self._bdf is None:
+            self._build(system, dt)
+        self._bdf.max_step = dt
+
+        message = self._bdf.step()
+        if self._bdf.status == "failed":
+            raise RuntimeError(f"BDF step failed at t={self._bdf.t:.3f}: {message}")
+
+        self.t = self._bdf.t
+        self.state = self._bdf.y.copy()
+        return system.calculate_state(self.t, self.state, input_ext)
+
+    def dense_output(self):
+        """上一步的连续插值 (scipy 的 BDF 插值多项式), 与 DenseSegment 一样可按时间调用"""
+        return self._bdf.dense_output()
+
+
+# 可用求解器 (供 CLI / Scanner 按名称选择)
+SOLVERS = {
+    "rk4": RK4Solver,
+    "rk45": RK45Solver,
+    "bdf": BDFSolver,
+}
+
+
+def make_solver(t0, y0, name="rk4", rtol=None, atol=None, **_):
+    """
+    按名称构造求解器。rtol/atol 只对自适应求解器生效。
+    多余的键 (例如 dt) 会被忽略, 便于直接传入 solver_options 字典。
+    """
+    if name not in SOLVERS:
+        raise ValueError(f"Unknown solver '{name}', choose from {sorted(SOLVERS)}")
+    cls = SOLVERS[name]
+    if not getattr(cls, "adaptive", False):
+        return cls(t0, y0)
+
+    kwargs = {}
+    if rtol is not None: kwargs["rtol"] = rtol
+    if atol is not None: kwargs["atol"] = atol
+    return cls(t0, y0, **kwargs)